@@ -1,7 +1,9 @@
-import pickle
 import json
-import sys
+import metrics
 import os
+from dictionary import preload_dictionary
+from history import TurnHistory
+from journal import TurnJournal
 
 # Letter values
 LETTER_VALUES = {
@@ -11,6 +13,137 @@ LETTER_VALUES = {
 	'Y': 4, 'Z': 10
 }
 
+ALPHABET = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+ALL_LETTERS = frozenset(ALPHABET)
+
+# (letter multiplier, word multiplier) for each bonus
+BONUS_MULTIPLIERS = {
+	None: (1, 1),
+	'2L': (2, 1),
+	'3L': (3, 1),
+	'2W': (1, 2),
+	'3W': (1, 3),
+}
+
+# Compact bonus codes, 0 means no bonus
+BONUS_CODES = [None, '2L', '3L', '2W', '3W']
+BONUS_INDEX = {bonus: code for code, bonus in enumerate(BONUS_CODES)}
+
+# Number of each tile in the bag, '_' is the blank
+TILE_DISTRIBUTION = {
+	'A': 9, 'B': 2, 'C': 2, 'D': 4, 'E': 12, 'F': 2, 'G': 3, 'H': 2,
+	'I': 9, 'J': 1, 'K': 1, 'L': 4, 'M': 2, 'N': 6, 'O': 8, 'P': 2,
+	'Q': 1, 'R': 6, 'S': 4, 'T': 6, 'U': 4, 'V': 2, 'W': 2, 'X': 1,
+	'Y': 2, 'Z': 1, '_': 2
+}
+
+# Special tiles of the standard board
+SPECIAL_TILES = {
+	(0, 0): '3W', (0, 7): '3W', (0, 14): '3W',
+	(7, 0): '3W', (7, 14): '3W', (14, 0): '3W',
+	(14, 7): '3W', (14, 14): '3W',
+
+	(1, 1): '2W', (2, 2): '2W', (3, 3): '2W',
+	(4, 4): '2W', (7, 7): '2W', (10, 10): '2W', 
+	(11, 11): '2W', (12, 12): '2W', (13, 13): '2W',
+
+	(1, 13): '2W', (2, 12): '2W', (3, 11): '2W',
+	(4, 10): '2W', (10, 4): '2W', (11, 3): '2W',
+	(12, 2): '2W', (13, 1): '2W',
+
+	(5, 1): '3L', (9, 1): '3L', (5, 5): '3L',
+	(9, 5): '3L', (1, 5): '3L', (13, 5): '3L',
+	(5, 9): '3L', (9, 9): '3L', (1, 9): '3L',
+	(13, 9): '3L', (5, 13): '3L', (9, 13): '3L',
+
+	(3, 0): '2L', (11, 0): '2L', (6, 2): '2L',
+	(8, 2): '2L', (0, 3): '2L', (7, 3): '2L',
+	(14, 3): '2L', (2, 6): '2L', (6, 6): '2L',
+	(8, 6): '2L', (12, 6): '2L', (3, 7): '2L',
+	(11, 7): '2L', (2, 8): '2L', (6, 8): '2L',
+	(8, 8): '2L', (12, 8): '2L', (0, 11): '2L',
+	(7, 11): '2L', (14, 11): '2L', (6, 12): '2L',
+	(8, 12): '2L', (3, 14): '2L', (11, 14): '2L',
+}
+
+class Layout:
+	'''
+	Size and special tiles of a board, worked out once and shared by every
+	board that uses it. bonuses has the bonus of each square (indexed by
+	row * size + col), codes the same as BONUS_CODES indexes and
+	special_tiles only the squares with a bonus, as (row, col, bonus).
+	'''
+	def __init__(self, size, special_tiles, name=None):
+		# The first word goes through the center square, so it has to exist
+		if not 1 <= size <= 255 or size % 2 == 0:
+			raise ValueError(f'board size has to be odd and at most 255, not {size}')
+		bonuses = [None] * (size * size)
+		for (row, col), bonus in special_tiles.items():
+			if not (0 <= row < size and 0 <= col < size):
+				raise ValueError(f'special tile {(row, col)} is off a {size}x{size} board')
+			if bonus not in BONUS_INDEX:
+				raise ValueError(f'unknown bonus {bonus!r}')
+			bonuses[row * size + col] = bonus
+
+		self.name = name
+		self.size = size
+		self.bonuses = tuple(bonuses)
+		self.codes = bytes(BONUS_INDEX[bonus] for bonus in bonuses)
+		self.special_tiles = tuple((i // size, i % size, bonus) for i, bonus in enumerate(bonuses) if bonus)
+
+STANDARD_LAYOUT = Layout(15, SPECIAL_TILES, 'standard')
+
+# Layouts without special tiles, by size
+plain_layouts = {}
+
+# Symbols of a layout file
+LAYOUT_SYMBOLS = {'.': None, 'd': '2L', 't': '3L', 'D': '2W', 'T': '3W'}
+
+def layout_for_size(size):
+	'''
+	The standard layout for a 15x15 board, no special tiles otherwise.
+	'''
+	if size == STANDARD_LAYOUT.size:
+		return STANDARD_LAYOUT
+	layout = plain_layouts.get(size)
+	if layout is None:
+		layout = plain_layouts[size] = Layout(size, {}, f'plain {size}x{size}')
+	return layout
+
+def parse_layout(text, name=None):
+	'''
+	Build a layout from a map with one line per row and one symbol per
+	square: '.' none, 'd' double letter, 't' triple letter, 'D' double word
+	and 'T' triple word. Empty lines and lines starting with '#' are skipped.
+	'''
+	rows = [line.strip() for line in text.splitlines()]
+	rows = [row for row in rows if row and not row.startswith('#')]
+	special_tiles = {}
+	for row, line in enumerate(rows):
+		if len(line) != len(rows):
+			raise ValueError(f'row {row + 1} has {len(line)} squares, the board is {len(rows)} rows high')
+		for col, symbol in enumerate(line):
+			if symbol not in LAYOUT_SYMBOLS:
+				raise ValueError(f'unknown symbol {symbol!r} in row {row + 1}')
+			if LAYOUT_SYMBOLS[symbol]:
+				special_tiles[(row, col)] = LAYOUT_SYMBOLS[symbol]
+	return Layout(len(rows), special_tiles, name)
+
+def load_layout(file_path):
+	'''
+	Read a layout map file, see parse_layout.
+	'''
+	with open(file_path, 'r') as file:
+		return parse_layout(file.read(), os.path.splitext(os.path.basename(file_path))[0])
+
+def tile_value(letter, blank):
+	'''
+	Points for a tile, blanks are worth nothing.
+	'''
+	if blank or letter not in LETTER_VALUES:
+		return 0
+	return LETTER_VALUES[letter]
+
 class Cell:
 	def __init__(self, letter=None, blank=False, locked=False, bonus=None):
 		self.letter = letter
@@ -19,10 +152,21 @@ class Cell:
 		self.bonus = bonus
 
 class Board:
-	def __init__(self, size=15):
-		self.size = size
-		self.grid = [[Cell() for _ in range(size)] for _ in range(size)]
-		self.initialize_special_tiles()
+	def __init__(self, size=15, layout=None):
+		if layout is None:
+			layout = layout_for_size(size)
+		self.size = layout.size
+		self.grid = [[Cell() for _ in range(self.size)] for _ in range(self.size)]
+		self.initialize_special_tiles(layout)
+
+		# Cross-check/anchor cache over the locked tiles, built on first use
+		# by compute_cross_checks and kept current by update_cross_checks.
+		# Indexed by row * size + col, keyed by play direction (horizontal).
+		# Copies share it until one of them updates it.
+		self.cross_checks = None
+		self.cross_sums = None
+		self.anchors = None
+		self.shared_cross_checks = False
 
 	def get_cell(self, row, col):
 		return self.grid[row][col]
@@ -47,56 +191,363 @@ class Board:
 		cell = self.grid[row][col]
 		cell.bonus = bonus
 
-	def initialize_special_tiles(self):
+	@classmethod
+	def from_arrays(cls, size, letters, blanks, locked, bonuses):
 		'''
-		Define special tiles.
+		Build a board in one pass from per-square arrays (letter codes,
+		blank flags, locked flags and bonus codes), e.g. a binary snapshot.
 		'''
-		special_tiles = {
-			(0, 0): '3W', (0, 7): '3W', (0, 14): '3W',
-			(7, 0): '3W', (7, 14): '3W', (14, 0): '3W',
-			(14, 7): '3W', (14, 14): '3W',
+		board = cls.__new__(cls)
+		board.size = size
+		board.grid = []
+		for row in range(size):
+			start = row * size
+			board.grid.append([
+				Cell(chr(letters[i]) if letters[i] else None, bool(blanks[i]), bool(locked[i]), BONUS_CODES[bonuses[i]])
+				for i in range(start, start + size)
+			])
+		board.cross_checks = None
+		board.cross_sums = None
+		board.anchors = None
+		board.shared_cross_checks = False
+		return board
 
-			(1, 1): '2W', (2, 2): '2W', (3, 3): '2W',
-			(4, 4): '2W', (7, 7): '2W', (10, 10): '2W', 
-			(11, 11): '2W', (12, 12): '2W', (13, 13): '2W',
+	def copy(self):
+		'''
+		Get an independent copy of the board.
+		'''
+		board = Board.__new__(Board)
+		board.size = self.size
+		board.grid = [[Cell(cell.letter, cell.blank, cell.locked, cell.bonus) for cell in row] for row in self.grid]
+		board.copy_cross_checks(self)
+		return board
 
-			(1, 13): '2W', (2, 12): '2W', (3, 11): '2W',
-			(4, 10): '2W', (10, 4): '2W', (11, 3): '2W',
-			(12, 2): '2W', (13, 1): '2W',
+	def copy_cross_checks(self, other):
+		'''
+		Share the cache of other until one of the boards updates it.
+		'''
+		self.cross_checks = other.cross_checks
+		self.cross_sums = other.cross_sums
+		self.anchors = other.anchors
+		self.shared_cross_checks = other.shared_cross_checks = other.cross_checks is not None
 
-			(5, 1): '3L', (9, 1): '3L', (5, 5): '3L',
-			(9, 5): '3L', (1, 5): '3L', (13, 5): '3L',
-			(5, 9): '3L', (9, 9): '3L', (1, 9): '3L',
-			(13, 9): '3L', (5, 13): '3L', (9, 13): '3L',
+	def own_cross_checks(self):
+		'''
+		Take a private copy of the cache before the first update after a copy.
+		'''
+		if self.shared_cross_checks:
+			self.cross_checks = {key: list(value) for key, value in self.cross_checks.items()}
+			self.cross_sums = {key: list(value) for key, value in self.cross_sums.items()}
+			self.anchors = list(self.anchors)
+			self.shared_cross_checks = False
 
-			(3, 0): '2L', (11, 0): '2L', (6, 2): '2L',
-			(8, 2): '2L', (0, 3): '2L', (7, 3): '2L',
-			(14, 3): '2L', (2, 6): '2L', (6, 6): '2L',
-			(8, 6): '2L', (12, 6): '2L', (3, 7): '2L',
-			(11, 7): '2L', (2, 8): '2L', (6, 8): '2L',
-			(8, 8): '2L', (12, 8): '2L', (0, 11): '2L',
-			(7, 11): '2L', (14, 11): '2L', (6, 12): '2L',
-			(8, 12): '2L', (3, 14): '2L', (11, 14): '2L',
-		}
+	def has_tile(self, row, col):
+		'''
+		Check if a locked tile is on the given square.
+		'''
+		cell = self.get_cell(row, col)
+		return bool(cell.locked and cell.letter)
 
-		for (row, col), bonus in special_tiles.items():
+	def cross_check(self, row, col, horizontal, dictionary):
+		'''
+		Get the letters that can go on an empty square when playing in the
+		given direction, and the points of the perpendicular tiles they join.
+		Returns (None, None) if there are no perpendicular tiles.
+		'''
+		dr, dc = (1, 0) if horizontal else (0, 1)
+		before = []
+		after = []
+		total = 0
+
+		r, c = row - dr, col - dc
+		while 0 <= r < self.size and 0 <= c < self.size and self.has_tile(r, c):
+			cell = self.get_cell(r, c)
+			before.append(cell.letter)
+			total += tile_value(cell.letter, cell.blank) * BONUS_MULTIPLIERS[cell.bonus][0]
+			r, c = r - dr, c - dc
+
+		r, c = row + dr, col + dc
+		while 0 <= r < self.size and 0 <= c < self.size and self.has_tile(r, c):
+			cell = self.get_cell(r, c)
+			after.append(cell.letter)
+			total += tile_value(cell.letter, cell.blank) * BONUS_MULTIPLIERS[cell.bonus][0]
+			r, c = r + dr, c + dc
+
+		if not before and not after:
+			return None, None
+
+		before = ''.join(reversed(before))
+		after = ''.join(after)
+		letters = frozenset(letter for letter in ALPHABET if before + letter + after in dictionary)
+		return letters, total
+
+	def is_anchor(self, row, col):
+		'''
+		Check if an empty square is next to a locked tile.
+		'''
+		if self.has_tile(row, col):
+			return False
+		for dr, dc in ((0, 1), (1, 0), (0, -1), (-1, 0)):
+			r, c = row + dr, col + dc
+			if 0 <= r < self.size and 0 <= c < self.size and self.has_tile(r, c):
+				return True
+		return False
+
+	def refresh_square(self, row, col, dictionary, horizontal):
+		index = row * self.size + col
+		if self.has_tile(row, col):
+			letters, total = None, None
+		else:
+			letters, total = self.cross_check(row, col, horizontal, dictionary)
+		self.cross_checks[horizontal][index] = letters
+		self.cross_sums[horizontal][index] = total
+
+	def compute_cross_checks(self, dictionary):
+		'''
+		Build the cross-check and anchor cache for the whole board.
+		'''
+		area = self.size * self.size
+		self.cross_checks = {True: [None] * area, False: [None] * area}
+		self.cross_sums = {True: [None] * area, False: [None] * area}
+		self.anchors = [False] * area
+		self.shared_cross_checks = False
+		for row in range(self.size):
+			for col in range(self.size):
+				self.refresh_square(row, col, dictionary, True)
+				self.refresh_square(row, col, dictionary, False)
+				self.anchors[row * self.size + col] = self.is_anchor(row, col)
+
+	def ensure_cross_checks(self, dictionary):
+		if self.cross_checks is None:
+			self.compute_cross_checks(dictionary)
+
+	def update_cross_checks(self, dictionary, tiles):
+		'''
+		Update the cache after tiles were locked or taken back. Only the columns (for
+		across plays) and rows (for down plays) of the tiles can change.
+		'''
+		if self.cross_checks is None:
+			return
+		self.own_cross_checks()
+
+		for col in set(col for _, col in tiles):
+			for row in range(self.size):
+				self.refresh_square(row, col, dictionary, True)
+		for row in set(row for row, _ in tiles):
+			for col in range(self.size):
+				self.refresh_square(row, col, dictionary, False)
+
+		for row, col in tiles:
+			for dr, dc in ((0, 0), (0, 1), (1, 0), (0, -1), (-1, 0)):
+				r, c = row + dr, col + dc
+				if 0 <= r < self.size and 0 <= c < self.size:
+					self.anchors[r * self.size + c] = self.is_anchor(r, c)
+
+	def verify_cross_checks(self, dictionary):
+		'''
+		Compare the cache against a full recomputation.
+		Returns the squares that disagree.
+		'''
+		if self.cross_checks is None:
+			return []
+
+		mismatches = []
+		for row in range(self.size):
+			for col in range(self.size):
+				index = row * self.size + col
+				expected = [self.is_anchor(row, col)]
+				cached = [self.anchors[index]]
+				for horizontal in (True, False):
+					if self.has_tile(row, col):
+						expected.extend((None, None))
+					else:
+						expected.extend(self.cross_check(row, col, horizontal, dictionary))
+					cached.extend((self.cross_checks[horizontal][index], self.cross_sums[horizontal][index]))
+				if expected != cached:
+					mismatches.append((row, col))
+		return mismatches
+
+	def initialize_special_tiles(self, layout=STANDARD_LAYOUT):
+		'''
+		Set special tiles.
+		'''
+		for row, col, bonus in layout.special_tiles:
 			self.grid[row][col].bonus = bonus
 
+class CellView:
+	'''
+	Cell-like view of one square of a CompactBoard.
+	'''
+	__slots__ = ('board', 'index')
+
+	def __init__(self, board, index):
+		self.board = board
+		self.index = index
+
+	@property
+	def letter(self):
+		code = self.board.letters[self.index]
+		return chr(code) if code else None
+
+	@letter.setter
+	def letter(self, letter):
+		self.board.own()
+		self.board.letters[self.index] = ord(letter) if letter else 0
+
+	@property
+	def blank(self):
+		return bool(self.board.blanks[self.index])
+
+	@blank.setter
+	def blank(self, blank):
+		self.board.own()
+		self.board.blanks[self.index] = 1 if blank else 0
+
+	@property
+	def locked(self):
+		return bool(self.board.locked[self.index])
+
+	@locked.setter
+	def locked(self, locked):
+		self.board.own()
+		self.board.locked[self.index] = 1 if locked else 0
+
+	@property
+	def bonus(self):
+		return BONUS_CODES[self.board.bonuses[self.index]]
+
+	@bonus.setter
+	def bonus(self, bonus):
+		self.board.own()
+		self.board.bonuses[self.index] = BONUS_INDEX[bonus]
+
+class CompactBoard(Board):
+	'''
+	Board stored as flat byte arrays (one byte per square for the letter,
+	blank flag, locked flag and bonus) instead of a grid of Cells.
+	Copies share the arrays until one of them is written to.
+	'''
+	def __init__(self, size=15, layout=None):
+		if layout is None:
+			layout = layout_for_size(size)
+		self.size = layout.size
+		area = self.size * self.size
+		self.letters = bytearray(area)
+		self.blanks = bytearray(area)
+		self.locked = bytearray(area)
+		self.bonuses = bytearray(area)
+		self.shared = False
+		self.initialize_special_tiles(layout)
+
+		self.cross_checks = None
+		self.cross_sums = None
+		self.anchors = None
+		self.shared_cross_checks = False
+
+	@classmethod
+	def from_board(cls, board):
+		'''
+		Build a compact copy of any board.
+		'''
+		compact = cls(board.size)
+		for row in range(board.size):
+			for col in range(board.size):
+				cell = board.get_cell(row, col)
+				compact.set_cell(row, col, cell.letter, cell.blank, cell.locked, cell.bonus)
+		compact.copy_cross_checks(board)
+		return compact
+
+	@classmethod
+	def from_arrays(cls, size, letters, blanks, locked, bonuses):
+		board = cls.__new__(cls)
+		board.size = size
+		board.letters = bytearray(letters)
+		board.blanks = bytearray(blanks)
+		board.locked = bytearray(locked)
+		board.bonuses = bytearray(bonuses)
+		board.shared = False
+		board.cross_checks = None
+		board.cross_sums = None
+		board.anchors = None
+		board.shared_cross_checks = False
+		return board
+
+	def own(self):
+		'''
+		Take a private copy of the arrays before the first write after copy().
+		'''
+		if self.shared:
+			self.letters = bytearray(self.letters)
+			self.blanks = bytearray(self.blanks)
+			self.locked = bytearray(self.locked)
+			self.bonuses = bytearray(self.bonuses)
+			self.shared = False
+
+	def copy(self):
+		board = CompactBoard.__new__(CompactBoard)
+		board.size = self.size
+		board.letters = self.letters
+		board.blanks = self.blanks
+		board.locked = self.locked
+		board.bonuses = self.bonuses
+		board.shared = True
+		self.shared = True
+		board.copy_cross_checks(self)
+		return board
+
+	def get_cell(self, row, col):
+		return CellView(self, row * self.size + col)
+
+	def set_cell(self, row, col, letter, blank=False, locked=False, bonus=None):
+		self.own()
+		index = row * self.size + col
+		self.letters[index] = ord(letter) if letter else 0
+		self.blanks[index] = 1 if blank else 0
+		self.locked[index] = 1 if locked else 0
+		self.bonuses[index] = BONUS_INDEX[bonus]
+
+	def set_letter(self, row, col, letter, blank=False):
+		self.own()
+		index = row * self.size + col
+		self.letters[index] = ord(letter) if letter else 0
+		self.blanks[index] = 1 if blank else 0
+
+	def set_locked(self, row, col, locked=True):
+		self.own()
+		self.locked[row * self.size + col] = 1 if locked else 0
+
+	def set_bonus(self, row, col, bonus=None):
+		self.own()
+		self.bonuses[row * self.size + col] = BONUS_INDEX[bonus]
+
+	def has_tile(self, row, col):
+		index = row * self.size + col
+		return bool(self.locked[index] and self.letters[index])
+
+	def initialize_special_tiles(self, layout=STANDARD_LAYOUT):
+		self.bonuses[:] = layout.codes
+
 class Game:
-	def __init__(self, num_teams, board=None, scores=None, current_player=None, first_word_placed=False, loading=False):
+	def __init__(self, num_teams, board=None, scores=None, current_player=None, first_word_placed=False, loading=False, autosave=True, turn=0, layout=None):
 		if loading:
 			# Load the saved game state
 			self.board = board
 			self.scores = scores
 			self.current_player = current_player
 		else:
-			# Set up a new game
-			self.board = Board()
+			# Set up a new game, on the standard board unless given a layout
+			self.board = Board(layout=layout)
 			self.scores = [0] * num_teams
 			self.current_player = 0
 		
 		# Needed for proper game state
 		self.first_word_placed = first_word_placed
+
+		# Number of turns taken so far
+		self.turn = turn
+
+		# Bumped whenever tiles get locked, so the UI can cache the board
+		self.board_version = 0
 		
 		self.dictionary = set()
 		self.placed_tiles = []
@@ -104,17 +555,37 @@ class Game:
 		self.main_word_tiles = []
 		self.secondary_word_tiles = []
 
+		# Phase timings when instrumentation is on, None otherwise
+		self.metrics = metrics.active
+
+		# Turns that can be undone, starting from this position. Squares
+		# locked this turn are kept as (index, letter, blank, bonus code)
+		self.history = TurnHistory(self.turn_state())
+		self.locked_tiles = []
+
+		# Journal every turn on top of 'scrabble_game.json', a new game
+		# starts with a fresh snapshot and an empty journal
+		self.turn_scores = list(self.scores)
+		self.journal = None
+		if autosave:
+			self.journal = TurnJournal()
+			if not loading:
+				self.journal.compact(self)
+
 	def load_dictionary(self, file_path):
 		'''
-		Loads a serialized word list.
+		Uses the process-wide dictionary for file_path, which loads in the
+		background. Lookups wait until it has finished loading.
 		'''
-		# Check if running as a PyInstaller bundle
-		if getattr(sys, 'frozen', False) and hasattr(sys, '_MEIPASS'):
-			# Adjust file_path to point to the bundled location
-			file_path = os.path.join(sys._MEIPASS, file_path)
+		self.dictionary = preload_dictionary(file_path)
 
-		with open(file_path, 'rb') as file:
-			self.dictionary = pickle.load(file)
+	def build_cross_checks(self):
+		'''
+		Build the board's cross-check cache once the dictionary has loaded.
+		From then on locking tiles only refreshes the squares around them,
+		and hints start from a copy of the cache.
+		'''
+		self.board.ensure_cross_checks(self.dictionary)
 
 	def save_game(self, filename='scrabble_game.json'):
 		'''
@@ -126,17 +597,96 @@ class Game:
 		for row in range(self.board.size):
 			board.append([])
 			for col in range(self.board.size):
-				cell = self.board.grid[row][col]
+				cell = self.board.get_cell(row, col)
 				board[-1].append({'letter': cell.letter, 'blank': cell.blank, 'locked': cell.locked, 'bonus': cell.bonus})
 
-		# Dump game state into json
-		with open(filename, 'w') as file:
-			json.dump({
-				'board': board,
-				'scores': self.scores,
-				'current_player': self.current_player,
-				'first_word_placed': self.first_word_placed
-			}, file, indent=4)
+		# Dump game state into json, through a temporary file so a crash
+		# never leaves a half written save. Encoded in one go without
+		# indentation, json.dump with indent=4 took milliseconds of small
+		# writes and this runs on the UI thread when the journal compacts.
+		text = json.dumps({
+			'board': board,
+			'scores': self.scores,
+			'current_player': self.current_player,
+			'first_word_placed': self.first_word_placed,
+			'turn': self.turn
+		}, separators=(',', ':'))
+		tmp_filename = filename + '.tmp'
+		with open(tmp_filename, 'w') as file:
+			file.write(text)
+			file.flush()
+			os.fsync(file.fileno())
+		os.replace(tmp_filename, filename)
+
+	def turn_state(self):
+		'''
+		Everything besides the board that undo has to restore.
+		'''
+		return (tuple(self.scores), self.current_player, self.first_word_placed, self.turn)
+
+	def undo(self):
+		'''
+		Take back the last turn, tiles placed this turn are removed.
+		Returns False if there is no turn to take back.
+		'''
+		step = self.history.undo()
+		if step is None:
+			return False
+		tiles, state = step
+		self.clear_placed_tiles()
+		for index, _, _, bonus in tiles:
+			self.board.set_cell(index // self.board.size, index % self.board.size, None, bonus=BONUS_CODES[bonus])
+		self.restore_turn(tiles, state)
+		return True
+
+	def redo(self):
+		'''
+		Play an undone turn again. Returns False if there is none.
+		'''
+		step = self.history.redo()
+		if step is None:
+			return False
+		tiles, state = step
+		self.clear_placed_tiles()
+		for index, letter, blank, _ in tiles:
+			self.board.set_cell(index // self.board.size, index % self.board.size, letter, blank, locked=True)
+		self.restore_turn(tiles, state)
+		return True
+
+	def clear_placed_tiles(self):
+		self.remove_placed_tiles()
+		self.active_tile = None
+		self.placed_tiles.clear()
+		self.main_word_tiles.clear()
+		self.secondary_word_tiles.clear()
+
+	def restore_turn(self, tiles, state):
+		scores, self.current_player, self.first_word_placed, self.turn = state
+		self.scores[:] = scores
+		self.turn_scores = list(self.scores)
+		size = self.board.size
+		self.board.update_cross_checks(self.dictionary, [(index // size, index % size) for index, _, _, _ in tiles])
+		self.board_version += 1
+		# The journal only goes forward, start it over from this position
+		if self.journal:
+			self.journal.compact(self)
+
+	def close(self):
+		'''
+		Flush the journal and metrics when leaving the game.
+		'''
+		if self.journal:
+			self.journal.close()
+		if self.metrics:
+			self.metrics.dump()
+
+	def place_tile(self, row, col, letter, blank=False):
+		'''
+		Place a tile for the current turn, like typing it on the board.
+		'''
+		self.board.set_letter(row, col, letter, blank)
+		if (row, col) not in self.placed_tiles:
+			self.placed_tiles.append((row, col))
 
 	def end_turn(self):
 		'''
@@ -145,26 +695,40 @@ class Game:
 			2. Updates score, and locks tiles if valid move.
 			3. Moves on to next team.
 		'''
+		timer = self.metrics.timer('end_turn') if self.metrics else None
 		if not self.first_word_placed:
 			if not self.check_first_turn_valid() or not self.check_word_valid():
 				self.remove_placed_tiles()
 				self.next_turn()
+				if timer:
+					timer.stop('rejected')
 				return
 			self.first_word_placed = True
 		elif not self.check_word_valid():
 			self.remove_placed_tiles()
 			self.next_turn()
+			if timer:
+				timer.stop('rejected')
 			return
+		if timer:
+			timer.lap('validate')
 		self.update_score()
+		if timer:
+			timer.lap('score')
 		self.lock_placed_tiles()
+		if timer:
+			timer.lap('lock')
 		self.next_turn()
+		if timer:
+			timer.stop('next_turn')
 
 	def check_first_turn_valid(self):
 		'''
 		Check if the first word goes through the center of the board.
 		'''
+		center = self.board.size // 2
 		for row, col in self.placed_tiles:
-			if row == 7 and col == 7:
+			if row == center and col == center:
 				return True
 		return False
 
@@ -223,10 +787,11 @@ class Game:
 		'''
 		Check if the given tile position is connected to an existing tile.
 		'''
+		size = self.board.size
 		directions = [(0, 1), (1, 0), (0, -1), (-1, 0)]
 		for dr, dc in directions:
 			r, c = row + dr, col + dc
-			if 0 <= r < 15 and 0 <= c < 15 and self.board.get_cell(r, c).locked:
+			if 0 <= r < size and 0 <= c < size and self.board.get_cell(r, c).locked:
 				return True
 		return False
 
@@ -406,19 +971,41 @@ class Game:
 		Lock placed tiles if valid move. Tiles can't be changed after placed.
 		'''
 		for row, col in self.placed_tiles:
+			cell = self.board.get_cell(row, col)
+			self.locked_tiles.append((row * self.board.size + col, cell.letter, cell.blank, BONUS_INDEX[cell.bonus]))
 			self.board.set_locked(row, col)
 			self.board.set_bonus(row, col)
+		self.board.update_cross_checks(self.dictionary, self.placed_tiles)
+		self.board_version += 1
 
 	def next_turn(self):
 		'''
-		Increase turn counter and reset previous tiles.
+		Increase turn counter, journal the turn and reset previous tiles.
 		'''
+		player = self.current_player
+		tiles = []
+		for row, col in self.placed_tiles:
+			cell = self.board.get_cell(row, col)
+			if cell.locked:
+				tiles.append([row, col, cell.letter, cell.blank])
+		record = {
+			'turn': self.turn + 1,
+			'player': player,
+			'tiles': tiles,
+			'score': self.scores[player] - self.turn_scores[player]
+		}
+
+		self.turn += 1
 		self.current_player = (self.current_player + 1) % len(self.scores)
 		self.active_tile = None
 		self.placed_tiles.clear()
 		self.main_word_tiles.clear()
 		self.secondary_word_tiles.clear()
-		self.save_game()
+		if self.journal:
+			self.journal.append(self, record)
+		self.turn_scores = list(self.scores)
+		self.history.push(self.locked_tiles, self.turn_state())
+		self.locked_tiles = []
 
 	def update_score(self):
 		'''
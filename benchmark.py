@@ -0,0 +1,276 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import dictionary
+from back import Board, Game, layout_for_size
+from journal import apply_records, journal_path
+from load_game import read_saved_game
+
+# Positions are turns of computer-vs-computer games, stored as journal
+# records so they replay the same way on every commit
+CORPUS_VERSION = 1
+CORPUS_PATH = 'benchmark_corpus.json'
+
+def build_corpus(num_games=10, seed=0, dictionary_path='word_list.lex'):
+    '''
+    Plays seeded games with the move generator and keeps every turn.
+    '''
+    from lexicon import Lexicon
+    from movegen import MoveGenerator
+    from simulate import play_game
+
+    generator = MoveGenerator(Lexicon(dictionary_path))
+    games = []
+    for i in range(num_games):
+        result = play_game(generator, seed + i)
+        records = []
+        for turn, move in enumerate(result['moves'], 1):
+            tiles = [list(tile) for tile in move.get('tiles', [])]
+            records.append({'turn': turn, 'player': move['player'], 'tiles': tiles, 'score': move['score']})
+        games.append({'seed': seed + i, 'records': records})
+    return {'version': CORPUS_VERSION, 'num_teams': 2, 'games': games}
+
+def load_corpus(path=CORPUS_PATH, rebuild=False):
+    if rebuild or not os.path.exists(path):
+        corpus = build_corpus()
+        with open(path, 'w') as file:
+            json.dump(corpus, file, separators=(',', ':'))
+        return corpus
+    with open(path, 'r') as file:
+        corpus = json.load(file)
+    if corpus['version'] != CORPUS_VERSION:
+        raise ValueError(f'{path} is version {corpus["version"]}, rebuild it with --rebuild-corpus')
+    return corpus
+
+def positions(corpus):
+    '''
+    A mid-game and a late-game position of every game, as (records
+    before the move, tiles of the move).
+    '''
+    found = []
+    for game in corpus['games']:
+        plays = [i for i, record in enumerate(game['records']) if record['tiles']]
+        for play in (plays[len(plays) // 2], plays[-1]):
+            records = game['records']
+            found.append((records[:play], records[play]['tiles']))
+    return found
+
+def make_game(num_teams, records, move=None, size=15):
+    '''
+    A game without autosave at the position after records, with the
+    tiles of move placed but not yet played. On a bigger board the
+    position is moved to stay around the center square.
+    '''
+    offset = (size - 15) // 2
+    if offset:
+        records = [dict(record, tiles=shift(record['tiles'], offset)) for record in records]
+        move = shift(move or [], offset)
+    scores = [0] * num_teams
+    board = Board(size)
+    current_player, first_word_placed, turn = apply_records(board, scores, 0, False, 0, records)
+    game = Game(num_teams, board, scores, current_player, first_word_placed, loading=True, autosave=False, turn=turn)
+    for row, col, letter, blank in move or []:
+        game.place_tile(row, col, letter, blank)
+    return game
+
+def shift(tiles, offset):
+    return [[row + offset, col + offset, letter, blank] for row, col, letter, blank in tiles]
+
+def stats(samples):
+    '''
+    Summary of timings in nanoseconds, as microseconds per operation.
+    '''
+    per_op = sorted(sample / 1000 for sample in samples)
+    return {
+        'runs': len(per_op),
+        'mean_us': statistics.fmean(per_op),
+        'median_us': statistics.median(per_op),
+        'min_us': per_op[0],
+        'max_us': per_op[-1],
+        'p95_us': per_op[min(len(per_op) - 1, int(len(per_op) * 0.95))],
+        'stdev_us': statistics.stdev(per_op) if len(per_op) > 1 else 0.0,
+    }
+
+def bench_load_dictionary(corpus, rounds, dictionary_path):
+    samples = []
+    for _ in range(rounds):
+        # Forget the process-wide dictionary so every round loads it again
+        dictionary.shared.clear()
+        game = Game(corpus['num_teams'], autosave=False)
+        start = time.perf_counter_ns()
+        game.load_dictionary(dictionary_path)
+        game.dictionary.get()
+        samples.append(time.perf_counter_ns() - start)
+    return stats(samples)
+
+def bench_move(corpus, rounds, words, run, prepare, size=15):
+    '''
+    Times run(game, *prepare(game)) on every position with its move placed.
+    '''
+    samples = []
+    for _ in range(rounds):
+        for records, move in positions(corpus):
+            game = make_game(corpus['num_teams'], records, move, size)
+            game.dictionary = words
+            args = prepare(game)
+            start = time.perf_counter_ns()
+            run(game, *args)
+            samples.append(time.perf_counter_ns() - start)
+    return stats(samples)
+
+def reset_words(game):
+    game.main_word_tiles = []
+    game.secondary_word_tiles = []
+    return ()
+
+def main_orientation(game):
+    reset_words(game)
+    return (game.get_main_word(),)
+
+def find_words(game):
+    game.get_secondary_words(*main_orientation(game))
+    return ()
+
+def bench_new_board(rounds, size):
+    layout_for_size(size)
+    samples = []
+    for _ in range(rounds * 20):
+        start = time.perf_counter_ns()
+        Board(size)
+        samples.append(time.perf_counter_ns() - start)
+    return stats(samples)
+
+def bench_save_game(corpus, rounds, directory):
+    filename = os.path.join(directory, 'save.json')
+    samples = []
+    for _ in range(rounds):
+        for records, _ in positions(corpus):
+            game = make_game(corpus['num_teams'], records)
+            start = time.perf_counter_ns()
+            game.save_game(filename)
+            samples.append(time.perf_counter_ns() - start)
+    return stats(samples)
+
+def bench_load_game(corpus, rounds, directory):
+    '''
+    What load_game does before opening the game screen: a new game's
+    snapshot plus a journal of every turn taken since.
+    '''
+    filename = os.path.join(directory, 'load.json')
+    samples = []
+    for _ in range(rounds):
+        for records, _ in positions(corpus):
+            make_game(corpus['num_teams'], []).save_game(filename)
+            with open(journal_path(filename), 'w') as file:
+                for record in records:
+                    file.write(json.dumps(record, separators=(',', ':')) + '\n')
+
+            start = time.perf_counter_ns()
+            read_saved_game(filename)
+            samples.append(time.perf_counter_ns() - start)
+    return stats(samples)
+
+def bench_draw_board(corpus, rounds):
+    # Offscreen, draw_board only needs fonts and a plain surface
+    import pygame
+    import front
+    pygame.font.init()
+    cell_size = 48
+    surface = pygame.Surface((15 * cell_size, 15 * cell_size))
+    font = pygame.font.Font(None, cell_size - 10)
+
+    samples = []
+    for _ in range(rounds):
+        for records, move in positions(corpus):
+            game = make_game(corpus['num_teams'], records, move)
+            start = time.perf_counter_ns()
+            front.draw_board(game.board, 0, 0, cell_size, surface, font, game.placed_tiles[-1], game.placed_tiles)
+            samples.append(time.perf_counter_ns() - start)
+    return stats(samples)
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_benchmarks(rounds=20, dictionary_path='word_list.lex', corpus_path=CORPUS_PATH, rebuild_corpus=False, only=None):
+    '''
+    Runs the benchmarks and returns their results as a JSON-ready dict.
+    '''
+    corpus = load_corpus(corpus_path, rebuild_corpus)
+    words = dictionary.read_dictionary(dictionary_path)
+
+    with tempfile.TemporaryDirectory() as directory:
+        benchmarks = {
+            'load_dictionary': lambda: bench_load_dictionary(corpus, max(1, rounds // 4), dictionary_path),
+            'check_word_valid': lambda: bench_move(corpus, rounds, words, Game.check_word_valid, reset_words),
+            # Same positions on a 21x21 board, validation should not get slower
+            'check_word_valid_21x21': lambda: bench_move(corpus, rounds, words, Game.check_word_valid, reset_words, 21),
+            'new_board': lambda: bench_new_board(rounds, 15),
+            'new_board_21x21': lambda: bench_new_board(rounds, 21),
+            'get_main_word': lambda: bench_move(corpus, rounds, words, Game.get_main_word, reset_words),
+            'get_secondary_words': lambda: bench_move(corpus, rounds, words, Game.get_secondary_words, main_orientation),
+            'update_score': lambda: bench_move(corpus, rounds, words, Game.update_score, find_words),
+            'save_game': lambda: bench_save_game(corpus, rounds, directory),
+            'load_game': lambda: bench_load_game(corpus, rounds, directory),
+            'draw_board': lambda: bench_draw_board(corpus, rounds),
+        }
+        results = {}
+        for name, bench in benchmarks.items():
+            if only and name not in only:
+                continue
+            results[name] = bench()
+
+    return {
+        'commit': git_commit(),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'rounds': rounds,
+        'positions': len(positions(corpus)),
+        'results': results,
+    }
+
+def compare(old, new):
+    '''
+    Median time of every benchmark in new relative to old, 1.10 being 10% slower.
+    '''
+    ratios = {}
+    for name, result in new['results'].items():
+        if name in old['results']:
+            ratios[name] = result['median_us'] / old['results'][name]['median_us']
+    return ratios
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Time the game logic on recorded positions.')
+    parser.add_argument('--rounds', type=int, default=20)
+    parser.add_argument('--dictionary', default='word_list.lex')
+    parser.add_argument('--corpus', default=CORPUS_PATH)
+    parser.add_argument('--rebuild-corpus', action='store_true')
+    parser.add_argument('--only', nargs='*', help='names of the benchmarks to run')
+    parser.add_argument('--output', default='benchmark.json')
+    parser.add_argument('--compare', help='an earlier output to compare against')
+    args = parser.parse_args()
+
+    report = run_benchmarks(args.rounds, args.dictionary, args.corpus, args.rebuild_corpus, args.only)
+    ratios = {}
+    if args.compare:
+        with open(args.compare, 'r') as file:
+            old = json.load(file)
+        ratios = compare(old, report)
+        report['compared_to'] = {'commit': old['commit'], 'median_ratios': ratios}
+    with open(args.output, 'w') as file:
+        json.dump(report, file, indent=4)
+
+    for name, result in report['results'].items():
+        line = f'{name:20} {result["median_us"]:12.1f} us'
+        if name in ratios:
+            line += f'  x{ratios[name]:.2f}'
+        print(line)
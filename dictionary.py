@@ -0,0 +1,112 @@
+import os
+import pickle
+import sys
+import threading
+from lexicon import Lexicon
+
+# Dictionaries loaded (or loading) in this process, by file path
+shared = {}
+shared_lock = threading.Lock()
+
+def read_dictionary(file_path):
+    '''
+    Loads a compiled lexicon (.lex) or a serialized word list (.pkl).
+    '''
+    # Check if running as a PyInstaller bundle
+    if getattr(sys, 'frozen', False) and hasattr(sys, '_MEIPASS'):
+        # Adjust file_path to point to the bundled location
+        file_path = os.path.join(sys._MEIPASS, file_path)
+
+    if file_path.endswith('.lex'):
+        return Lexicon(file_path)
+
+    with open(file_path, 'rb') as file:
+        return pickle.load(file)
+
+class LazyDictionary:
+    '''
+    Dictionary loaded in a background thread. Lookups made before it
+    finishes loading wait for it.
+    '''
+    def __init__(self, file_path):
+        self.path = file_path
+        self.words = None
+        self.error = None
+        self.ready = threading.Event()
+        # The move generator's GADDAG, opened after the words. It is None
+        # when it wasn't shipped, the hint engine then builds it.
+        self.gaddag = None
+        self.gaddag_error = None
+        self.gaddag_ready = threading.Event()
+        self.thread = threading.Thread(target=self.load, name='dictionary-loader', daemon=True)
+        self.thread.start()
+
+    def load(self):
+        try:
+            self.words = read_dictionary(self.path)
+        except Exception as error:
+            self.error = error
+        finally:
+            self.ready.set()
+
+        try:
+            if isinstance(self.words, Lexicon):
+                # movegen needs back, which needs this module
+                from movegen import load_gaddag
+
+                self.gaddag = load_gaddag(self.words, build=False)
+        except Exception as error:
+            self.gaddag_error = error
+        finally:
+            self.gaddag_ready.set()
+
+    def is_loaded(self):
+        return self.ready.is_set()
+
+    def get(self):
+        '''
+        The loaded word list, waiting for the loader if needed.
+        '''
+        self.ready.wait()
+        if self.error is not None:
+            raise self.error
+        return self.words
+
+    def get_gaddag(self):
+        '''
+        The GADDAG for the word list, waiting for the loader if needed.
+        None when the words aren't a compiled lexicon or it has no GADDAG.
+        '''
+        self.gaddag_ready.wait()
+        if self.gaddag_error is not None:
+            raise self.gaddag_error
+        return self.gaddag
+
+    def __contains__(self, word):
+        return word in self.get()
+
+    def __iter__(self):
+        return iter(self.get())
+
+    def __len__(self):
+        return len(self.get())
+
+    def __reduce__(self):
+        # Other processes get the loaded word list itself
+        return (read_dictionary, (self.path,))
+
+    @property
+    def file_path(self):
+        return self.get().file_path
+
+def preload_dictionary(file_path='word_list.lex'):
+    '''
+    Start loading a dictionary in the background, once per process.
+    Every call with the same path shares the same dictionary.
+    '''
+    with shared_lock:
+        dictionary = shared.get(file_path)
+        if dictionary is None:
+            dictionary = LazyDictionary(file_path)
+            shared[file_path] = dictionary
+        return dictionary
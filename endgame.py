@@ -0,0 +1,349 @@
+import argparse
+import random
+import sys
+import time
+from back import ALPHABET, CompactBoard, tile_value
+from lexicon import KnownWords, Lexicon
+from movegen import MoveGenerator
+
+# Tile kinds on a rack, the blank last
+KINDS = ALPHABET + '_'
+KIND_VALUES = [tile_value(kind, False) for kind in KINDS]
+INFINITY = float('inf')
+
+# Transposition table bounds: the stored value is exact, at least the
+# value (the search failed high) or at most the value (it failed low)
+EXACT, LOWER, UPPER = 0, 1, 2
+
+# A pass in a move sequence
+PASS = None
+
+class SearchTimeout(Exception):
+    pass
+
+def kind_of(letter, blank):
+    return 26 if blank else ord(letter) - ord('A')
+
+class EndgameSolver:
+    '''
+    Finds the best finish once the bag is empty and both racks are known.
+
+    Negamax alpha-beta over the spread gained from the position, deepened
+    one ply at a time until the time limit or until every line reaches the
+    end of the game. Positions are Zobrist hashed (board tiles, both racks,
+    side to move) into a transposition table that also orders the moves of
+    the next iteration, then plays that go out, then the highest scoring.
+
+    The game ends when a player goes out, who then scores the other rack
+    twice (added to theirs, taken from the other), or when both players
+    pass in a row, each losing what is left on their rack. Lines cut off by
+    the depth are valued by that rule, as if both passed there.
+    '''
+    def __init__(self, dictionary, generator=None, table_size=500000, move_cache_size=200000):
+        self.dictionary = KnownWords(dictionary)
+        self.generator = generator if generator is not None else MoveGenerator(dictionary)
+        self.table_size = table_size
+        # Most moves kept for positions seen before, across all of them
+        self.move_cache_size = move_cache_size
+        # Fixed seed, so a position hashes the same way every run
+        rng = random.Random(0)
+        self.tile_keys = {}
+        self.rack_keys = [[[rng.getrandbits(64) for _ in range(8)] for _ in KINDS] for _ in range(2)]
+        self.side_keys = [[rng.getrandbits(64) for _ in range(2)] for _ in range(2)]
+        self.rng = rng
+
+    def square_keys(self, size):
+        # Keys of every (square, tile kind), made once per board size
+        keys = self.tile_keys.get(size)
+        if keys is None:
+            keys = self.tile_keys[size] = [[self.rng.getrandbits(64) for _ in KINDS] for _ in range(size * size)]
+        return keys
+
+    def solve(self, board, rack, opponent_rack, time_limit=10.0, spread=0, max_depth=30):
+        '''
+        Best finish for the player holding rack, opponent_rack being the
+        other rack ('_' for blanks) and spread their lead so far.
+
+        Returns a dict with the sequence of moves (Move, or PASS) starting
+        with this player, the value (spread gained by the sequence), the
+        final spread, the depth searched, whether the search reached the
+        end of every line (complete), and node statistics.
+        '''
+        start = time.perf_counter()
+        self.deadline = start + time_limit
+        # Work on a copy with only locked tiles on it
+        self.board = CompactBoard.from_board(board)
+        for row in range(self.board.size):
+            for col in range(self.board.size):
+                if not self.board.has_tile(row, col):
+                    self.board.set_letter(row, col, None)
+        self.board.ensure_cross_checks(self.dictionary)
+        self.keys = self.square_keys(self.board.size)
+        self.board_hash = 0
+        # Squares of every move made, how many of them the cross-checks
+        # include, and the cross-checks from before each update
+        self.pending = []
+        self.synced = 0
+        self.saved = []
+        self.racks = [bytearray(len(KINDS)), bytearray(len(KINDS))]
+        for player, tiles in enumerate((rack, opponent_rack)):
+            if len(tiles) > 7:
+                raise ValueError('a rack holds at most 7 tiles')
+            for tile in tiles.upper():
+                self.racks[player][KINDS.index(tile)] += 1
+        self.rack_hashes = [0, 0]
+        for player in range(2):
+            for kind, count in enumerate(self.racks[player]):
+                self.rack_hashes[player] ^= self.rack_keys[player][kind][count]
+        self.table = {}
+        self.move_cache = {}
+        self.cached_moves = 0
+        self.nodes = 0
+        self.table_hits = 0
+
+        best = None
+        depth = 0
+        while depth < max_depth:
+            depth += 1
+            self.horizon = False
+            try:
+                value, line = self.search(depth, -INFINITY, INFINITY, 0, False)
+            except SearchTimeout:
+                break
+            best = (value, line, depth, not self.horizon)
+            if not self.horizon:
+                # Every line ran to the end of the game
+                break
+
+        if best is None:
+            # Not even one ply in time, fall back on the top scoring play
+            move = self.moves(0, timed=False)[0]
+            best = (move.score if move is not PASS else 0, (move,), 0, False)
+
+        value, line, depth, complete = best
+        seconds = time.perf_counter() - start
+        return {
+            'sequence': list(line),
+            'value': value,
+            'spread': spread + value,
+            'depth': depth,
+            'complete': complete,
+            'nodes': self.nodes,
+            'table_hits': self.table_hits,
+            'seconds': seconds,
+            'nodes_per_second': self.nodes / seconds if seconds else 0,
+        }
+
+    def rack_value(self, player):
+        return sum(count * value for count, value in zip(self.racks[player], KIND_VALUES))
+
+    def moves(self, player, timed=True):
+        '''
+        Moves of the player in the current position, plays going out
+        first, then by score, and passing last. Unless timed is False,
+        raises SearchTimeout if the time runs out while generating them.
+        '''
+        key = self.board_hash ^ self.rack_hashes[player] ^ self.side_keys[player][0]
+        moves = self.move_cache.get(key)
+        if moves is None:
+            counts = self.racks[player]
+            rack = ''.join(kind * count for kind, count in zip(KINDS, counts))
+            self.sync_cross_checks()
+            generated = self.generator.generate(self.board, rack, self.out_of_time if timed else None)
+            if timed and self.out_of_time():
+                # Only some of the moves were found
+                raise SearchTimeout
+            moves = [move for move in generated if len(move.tiles) == len(rack)]
+            moves += [move for move in generated if len(move.tiles) != len(rack)]
+            moves.append(PASS)
+            if self.cached_moves + len(moves) > self.move_cache_size:
+                self.move_cache.clear()
+                self.cached_moves = 0
+            self.move_cache[key] = moves
+            self.cached_moves += len(moves)
+        return moves
+
+    def out_of_time(self):
+        return time.perf_counter() > self.deadline
+
+    def search(self, depth, alpha, beta, player, passed):
+        '''
+        Value of the position for player, the spread they gain from here,
+        and the line of moves getting it. passed is True when the last
+        move was a pass.
+        '''
+        self.nodes += 1
+        if not self.nodes & 63 and time.perf_counter() > self.deadline:
+            raise SearchTimeout
+        if depth == 0:
+            self.horizon = True
+            return self.rack_value(1 - player) - self.rack_value(player), ()
+
+        key = self.board_hash ^ self.rack_hashes[0] ^ self.rack_hashes[1] ^ self.side_keys[player][passed]
+        entry = self.table.get(key)
+        best_first = None
+        if entry is not None:
+            entry_depth, value, bound, line, solved = entry
+            # Values of lines that all reached the end hold at any depth
+            if solved or entry_depth >= depth:
+                if bound == EXACT or (bound == LOWER and value >= beta) or (bound == UPPER and value <= alpha):
+                    self.table_hits += 1
+                    if not solved:
+                        self.horizon = True
+                    return value, line
+            best_first = line[:1]
+
+        moves = self.moves(player)
+        if best_first:
+            moves = list(best_first) + [move for move in moves if not same_move(move, best_first[0])]
+
+        outer_horizon = self.horizon
+        self.horizon = False
+        start_alpha = alpha
+        best_value = -INFINITY
+        best_line = ()
+        for move in moves:
+            value, line = self.try_move(move, depth, alpha, beta, player, passed)
+            if value > best_value:
+                best_value = value
+                best_line = (move,) + line
+                if value > alpha:
+                    alpha = value
+                    if alpha >= beta:
+                        break
+        solved = not self.horizon
+        self.horizon = self.horizon or outer_horizon
+
+        if best_value <= start_alpha:
+            bound = UPPER
+        elif best_value >= beta:
+            bound = LOWER
+        else:
+            bound = EXACT
+        if len(self.table) < self.table_size or key in self.table:
+            self.table[key] = (depth, best_value, bound, best_line, solved)
+        return best_value, best_line
+
+    def try_move(self, move, depth, alpha, beta, player, passed):
+        other = 1 - player
+        if move is PASS:
+            if passed:
+                # Two passes in a row end the game
+                return self.rack_value(other) - self.rack_value(player), ()
+            value, line = self.search(depth - 1, -beta, -alpha, other, True)
+            return -value, line
+
+        bonuses = self.make(move, player)
+        try:
+            if not any(self.racks[player]):
+                return move.score + 2 * self.rack_value(other), ()
+            # The window is shifted by what this move scores
+            value, line = self.search(depth - 1, move.score - beta, move.score - alpha, other, False)
+            return move.score - value, line
+        finally:
+            self.unmake(move, player, bonuses)
+
+    def take_tile(self, player, kind, change):
+        counts = self.racks[player]
+        keys = self.rack_keys[player][kind]
+        self.rack_hashes[player] ^= keys[counts[kind]] ^ keys[counts[kind] + change]
+        counts[kind] += change
+
+    def make(self, move, player):
+        '''
+        Lock the tiles of move on the board, returns the bonuses they covered.
+        The cross-checks are brought up to date only when moves are
+        generated, most positions at the end of a line never need them.
+        '''
+        board = self.board
+        bonuses = []
+        for row, col, letter, blank in move.tiles:
+            bonuses.append(board.get_cell(row, col).bonus)
+            board.set_cell(row, col, letter, blank, True)
+            self.board_hash ^= self.keys[row * board.size + col][kind_of(letter, blank)]
+            self.take_tile(player, 26 if blank else kind_of(letter, False), -1)
+        self.pending.append([(row, col) for row, col, _, _ in move.tiles])
+        return bonuses
+
+    def unmake(self, move, player, bonuses):
+        board = self.board
+        for (row, col, letter, blank), bonus in zip(move.tiles, bonuses):
+            board.set_cell(row, col, None, False, False, bonus)
+            self.board_hash ^= self.keys[row * board.size + col][kind_of(letter, blank)]
+            self.take_tile(player, 26 if blank else kind_of(letter, False), 1)
+        self.pending.pop()
+        if self.synced > len(self.pending):
+            self.synced, board.cross_checks, board.cross_sums, board.anchors = self.saved.pop()
+
+    def sync_cross_checks(self):
+        '''
+        Update the cross-checks for the moves made since the last update,
+        keeping the old ones to put back when those moves are unmade.
+        '''
+        if self.synced == len(self.pending):
+            return
+        board = self.board
+        self.saved.append((
+            self.synced,
+            {horizontal: list(checks) for horizontal, checks in board.cross_checks.items()},
+            {horizontal: list(sums) for horizontal, sums in board.cross_sums.items()},
+            list(board.anchors),
+        ))
+        squares = [square for squares in self.pending[self.synced:] for square in squares]
+        board.update_cross_checks(self.dictionary, squares)
+        self.synced = len(self.pending)
+
+def same_move(move, other):
+    if move is PASS or other is PASS:
+        return move is other
+    return move.tiles == other.tiles
+
+def describe(board, sequence):
+    '''
+    Labels for a solved sequence, played out on a copy of board.
+    '''
+    from hints import move_label
+
+    board = CompactBoard.from_board(board)
+    labels = []
+    for move in sequence:
+        if move is PASS:
+            labels.append('pass')
+            continue
+        labels.append(move_label(board, move))
+        for row, col, letter, blank in move.tiles:
+            board.set_cell(row, col, letter, blank, True)
+    return labels
+
+if __name__ == '__main__':
+    from load_game import read_saved_game
+    from tile_tracker import TileTracker
+
+    parser = argparse.ArgumentParser(description='Solve the endgame of the saved game for the team to move.')
+    parser.add_argument('rack', help='rack of the team to move, _ for blanks')
+    parser.add_argument('opponent_rack', nargs='?', help='the other rack, the unseen tiles if not given')
+    parser.add_argument('--time', type=float, default=10.0, help='time limit in seconds')
+    parser.add_argument('--dictionary', default='word_list.lex')
+    args = parser.parse_args()
+
+    data = read_saved_game()
+    if data is None:
+        sys.exit('no saved game')
+    board = data['board']
+    opponent_rack = args.opponent_rack
+    if opponent_rack is None:
+        tracker = TileTracker(board, args.rack)
+        if tracker.total > 7:
+            sys.exit(f'{tracker.total} tiles unseen, the bag is not empty')
+        opponent_rack = ''.join(tile * count for tile, count in tracker.unseen().items())
+
+    scores = data['scores']
+    player = data['current_player']
+    spread = scores[player] - scores[1 - player] if len(scores) == 2 else 0
+    solver = EndgameSolver(Lexicon(args.dictionary))
+    result = solver.solve(board, args.rack, opponent_rack, args.time, spread)
+
+    for i, label in enumerate(describe(board, result['sequence'])):
+        print(f'{"us  " if i % 2 == 0 else "them"} {label}')
+    print(f'final spread {result["spread"]:+d} ({result["value"]:+d}), depth {result["depth"]}{"" if result["complete"] else ", not complete"}')
+    print(f'{result["nodes"]} nodes in {result["seconds"]:.2f}s, {result["nodes_per_second"]:.0f} nodes/s, {result["table_hits"]} table hits')
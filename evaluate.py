@@ -0,0 +1,163 @@
+from back import BONUS_MULTIPLIERS, tile_value
+
+class Evaluation:
+    '''
+    Outcome of evaluating one candidate play.
+    '''
+    def __init__(self, valid, words, score):
+        self.valid = valid
+        self.words = words
+        self.score = score
+
+    def __repr__(self):
+        return f'Evaluation(valid={self.valid}, words={self.words}, score={self.score})'
+
+class Snapshot:
+    '''
+    Read-only copy of the squares of a board, taken once per batch.
+    '''
+    def __init__(self, board):
+        self.size = board.size
+        self.squares = []
+        for row in range(board.size):
+            for col in range(board.size):
+                cell = board.get_cell(row, col)
+                self.squares.append((cell.letter or None, cell.blank, cell.locked, cell.bonus))
+
+    def square(self, row, col):
+        return self.squares[row * self.size + col]
+
+class BoardView:
+    '''
+    Reads squares straight from a live board, so evaluating one play only
+    looks at the lines it is on instead of copying the board first.
+    '''
+    def __init__(self, board):
+        self.board = board
+        self.size = board.size
+
+    def square(self, row, col):
+        cell = self.board.get_cell(row, col)
+        return (cell.letter or None, cell.blank, cell.locked, cell.bonus)
+
+def evaluate_moves(board, candidates, dictionary, first_word_placed=True):
+    '''
+    Evaluates candidate plays against a board without changing it.
+    Each candidate is a list of (row, col, letter, blank) tiles.
+    Dictionary lookups are shared across the whole batch.
+    '''
+    snapshot = Snapshot(board)
+    lookups = {}
+    return [evaluate_tiles(snapshot, tiles, dictionary, first_word_placed, lookups) for tiles in candidates]
+
+def evaluate_move(board, tiles, dictionary, first_word_placed=True):
+    '''
+    Evaluates one candidate play against a board without changing it.
+    The tiles may already be on the board, unlocked.
+    '''
+    return evaluate_tiles(BoardView(board), tiles, dictionary, first_word_placed, {})
+
+def evaluate_tiles(snapshot, tiles, dictionary, first_word_placed, lookups):
+    '''
+    Applies the rules of Game.check_word_valid and Game.update_score
+    to tiles laid over a snapshot.
+    '''
+    invalid = Evaluation(False, [], 0)
+    size = snapshot.size
+    placed = {}
+    for row, col, letter, blank in tiles:
+        if not (0 <= row < size and 0 <= col < size) or (row, col) in placed:
+            return invalid
+        if snapshot.square(row, col)[2]:
+            return invalid
+        placed[(row, col)] = (letter, blank)
+
+    # 1. Uses 7 or fewer tiles, 2. only in 1 row or column
+    rows = sorted(set(row for row, _ in placed))
+    cols = sorted(set(col for _, col in placed))
+    if not placed or len(placed) > 7 or (len(rows) != 1 and len(cols) != 1):
+        return invalid
+
+    # The first word goes through the center, later words touch a locked tile
+    center = size // 2
+    if not first_word_placed:
+        if (center, center) not in placed:
+            return invalid
+    elif not any(touches_locked(snapshot, row, col) for row, col in placed):
+        return invalid
+
+    def square(row, col):
+        if (row, col) in placed:
+            letter, blank = placed[(row, col)]
+            return letter, blank, snapshot.square(row, col)[3]
+        letter, blank, _, bonus = snapshot.square(row, col)
+        return letter, blank, bonus
+
+    # 3. Tiles form a continuous sequence
+    if len(rows) == 1:
+        horizontal = True
+        if any(not square(rows[0], col)[0] for col in range(cols[0], cols[-1] + 1)):
+            return invalid
+    else:
+        horizontal = False
+        if any(not square(row, cols[0])[0] for row in range(rows[0], rows[-1] + 1)):
+            return invalid
+
+    # Main word, a lone tile takes the longer of its two words
+    first = min(placed)
+    if len(placed) == 1:
+        row_word = line_word(square, size, first, True)
+        col_word = line_word(square, size, first, False)
+        horizontal = len(row_word) > len(col_word)
+        main_word = row_word if horizontal else col_word
+    else:
+        main_word = line_word(square, size, first, horizontal)
+
+    word_lists = [main_word]
+    for position in sorted(placed):
+        secondary = line_word(square, size, position, not horizontal)
+        if len(secondary) > 1:
+            word_lists.append(secondary)
+
+    # 4. In the dictionary
+    words = [''.join(letter for letter, _, _ in word) for word in word_lists]
+    for word in words:
+        if word not in lookups:
+            lookups[word] = word in dictionary
+        if not lookups[word]:
+            return Evaluation(False, words, 0)
+
+    score = sum(word_score(word) for word in word_lists)
+    if len(placed) == 7:
+        score += 50
+    return Evaluation(True, words, score)
+
+def touches_locked(snapshot, row, col):
+    for dr, dc in ((0, 1), (1, 0), (0, -1), (-1, 0)):
+        r, c = row + dr, col + dc
+        if 0 <= r < snapshot.size and 0 <= c < snapshot.size and snapshot.square(r, c)[2]:
+            return True
+    return False
+
+def line_word(square, size, position, horizontal):
+    '''
+    Squares of the word running through position in one direction.
+    '''
+    row, col = position
+    dr, dc = (0, 1) if horizontal else (1, 0)
+    while 0 <= row - dr and 0 <= col - dc and square(row - dr, col - dc)[0]:
+        row, col = row - dr, col - dc
+    word = []
+    while row < size and col < size and square(row, col)[0]:
+        word.append(square(row, col))
+        row, col = row + dr, col + dc
+    return word
+
+def word_score(word):
+    score = 0
+    word_multiplier = 1
+    for letter, blank, bonus in word:
+        letter_multiplier, multiplier = BONUS_MULTIPLIERS.get(bonus, (1, 1))
+        score += tile_value(letter, blank) * letter_multiplier
+        word_multiplier *= multiplier
+    return score * word_multiplier
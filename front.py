@@ -1,12 +1,18 @@
 import pygame
 import sys
+import time
 from back import Game
+from evaluate import evaluate_move
+from hints import HintEngine, move_label
+from screen_loop import EXPOSE_EVENTS, screen_loop
+from text_cache import draw_text, render_text
 
 # Constants
 BLUE = (20, 100, 150)
 WHITE = (255, 255, 255)
 BLACK = (0, 0, 0)
 HIGHLIGHT_COLOR = (0, 255, 0)  # Bright Green for highlighting the active team score / active tile
+INVALID_COLOR = (230, 60, 60)  # Red for a play that would be rejected
 BUTTON_WIDTH = 200
 BUTTON_HEIGHT = 60
 CELL_THICKNESS = 1
@@ -19,21 +25,46 @@ SPECIAL_TILE_COLORS = {
                         '3W':(204, 102, 153) # Steel Pink
                     }
 
-def draw_text(text, font, color, surface, x, y):
-    textobj = font.render(text, True, color)
-    textrect = textobj.get_rect(center=(x, y))
-    surface.blit(textobj, textrect)
-    return textrect
-
 def draw_rounded_rect(surface, color, rect, radius):
     pygame.draw.rect(surface, color, rect, border_radius=radius)
 
 def align_text_and_rect(text, font, surface, rect):
-    textobj = font.render(text, True, BLACK)
+    textobj = render_text(text, font, BLACK)
     textrect = textobj.get_rect(center=rect.center)
     surface.blit(textobj, textrect)
     return textrect
 
+def draw_cell(surface, font, cell, rect, show_letter=True):
+    '''
+    Draws one cell: bonus color, grid line, letter and blank underline.
+    '''
+    # Set color for special tiles
+    if cell.bonus:
+        color = SPECIAL_TILE_COLORS[cell.bonus]
+    else:
+        color = WHITE
+
+    pygame.draw.rect(surface, color, rect)
+    pygame.draw.rect(surface, BLACK, rect, 1)
+
+    if not show_letter:
+        return
+
+    # Draw letter
+    if cell.letter:
+        draw_text(cell.letter, font, BLACK, surface, rect.centerx, rect.centery)
+
+    # Draw underline for blank tile
+    if cell.blank:
+        line_margin = rect.width // 4
+
+        # Calculate underline position
+        underline_start = (rect.left + line_margin, rect.bottom - line_margin)
+        underline_end = (rect.right - line_margin, rect.bottom - line_margin)
+
+        # Draw the underline
+        pygame.draw.line(surface, BLACK, underline_start, underline_end, 4)
+
 def draw_board(board, board_x, board_y, cell_size, surface, font, active_tile, placed_tiles):
     '''
     Draws the Scrabble board.
@@ -42,30 +73,7 @@ def draw_board(board, board_x, board_y, cell_size, surface, font, active_tile, p
         for col in range(board.size):
             cell = board.get_cell(row, col)
             rect = pygame.Rect(board_x + col * cell_size, board_y + row * cell_size, cell_size, cell_size)
-            
-            # Set color for special tiles
-            if cell.bonus:
-                color = SPECIAL_TILE_COLORS[cell.bonus]
-            else:
-                color = WHITE
-            
-            pygame.draw.rect(surface, color, rect)
-            pygame.draw.rect(surface, BLACK, rect, 1)
-
-            # Draw letter
-            if cell.letter:
-                draw_text(cell.letter, font, BLACK, surface, board_x + col * cell_size + cell_size // 2, board_y + row * cell_size + cell_size // 2)
-
-            # Draw underline for blank tile
-            if cell.blank:
-                line_margin = cell_size // 4
-
-                # Calculate underline position
-                underline_start = (rect.left + line_margin, rect.bottom - line_margin)
-                underline_end = (rect.right - line_margin, rect.bottom - line_margin)
-
-                # Draw the underline
-                pygame.draw.line(surface, BLACK, underline_start, underline_end, 4)
+            draw_cell(surface, font, cell, rect)
 
             # Highlight placed tiles
             if (row, col) in placed_tiles:
@@ -77,6 +85,75 @@ def draw_board(board, board_x, board_y, cell_size, surface, font, active_tile, p
                 if (active_row, active_col) == (row, col):
                     pygame.draw.rect(surface, HIGHLIGHT_COLOR, rect, 3 * CELL_THICKNESS)
 
+class BoardRenderer:
+    '''
+    Draws the board in layers: the empty squares and locked tiles are
+    cached on a surface that is only redrawn after tiles get locked, and
+    only the tiles of the current turn are drawn every frame.
+    '''
+    def __init__(self, board, board_x, board_y, cell_size, font):
+        self.board = board
+        self.board_x = board_x
+        self.board_y = board_y
+        self.cell_size = cell_size
+        self.font = font
+        self.layer = pygame.Surface((board.size * cell_size, board.size * cell_size))
+        self.version = None
+        # Screen rects of the cells drawn over the layer last frame
+        self.overlay_rects = []
+
+    def cell_rect(self, row, col):
+        return pygame.Rect(self.board_x + col * self.cell_size, self.board_y + row * self.cell_size, self.cell_size, self.cell_size)
+
+    def refresh(self, version):
+        '''
+        Redraws the cached layer if tiles were locked since the last call.
+        Returns True if it was redrawn.
+        '''
+        if version == self.version:
+            return False
+        self.version = version
+        for row in range(self.board.size):
+            for col in range(self.board.size):
+                cell = self.board.get_cell(row, col)
+                rect = pygame.Rect(col * self.cell_size, row * self.cell_size, self.cell_size, self.cell_size)
+                draw_cell(self.layer, self.font, cell, rect, show_letter=cell.locked)
+        return True
+
+    def draw_layer(self, surface):
+        surface.blit(self.layer, (self.board_x, self.board_y))
+
+    def draw_overlay(self, surface, active_tile, placed_tiles, blank_tile_pos=None, blank_tile_text=''):
+        '''
+        Restores the cells drawn last frame from the layer and draws this
+        frame's placed tiles, active tile and blank input box over it.
+        Returns the screen rects that changed.
+        '''
+        for rect in self.overlay_rects:
+            surface.blit(self.layer, rect, rect.move(-self.board_x, -self.board_y))
+
+        rects = []
+        for row, col in placed_tiles:
+            rect = self.cell_rect(row, col)
+            draw_cell(surface, self.font, self.board.get_cell(row, col), rect)
+            pygame.draw.rect(surface, BLACK, rect, 3 * CELL_THICKNESS)
+            rects.append(rect)
+
+        if active_tile:
+            rect = self.cell_rect(*active_tile)
+            pygame.draw.rect(surface, HIGHLIGHT_COLOR, rect, 3 * CELL_THICKNESS)
+            rects.append(rect)
+
+        if blank_tile_pos:
+            rect = self.cell_rect(*blank_tile_pos)
+            pygame.draw.rect(surface, WHITE, rect)
+            draw_text(blank_tile_text, self.font, BLACK, surface, rect.centerx, rect.centery)
+            rects.append(rect)
+
+        dirty = self.overlay_rects + rects
+        self.overlay_rects = rects
+        return dirty
+
 def draw_team_scores(game, surface, font, team_x, team_y, spacing):
     '''
     Draw team scores.
@@ -113,18 +190,58 @@ def draw_legend(surface, font, legend_x, legend_y, legend_spacing, cell_size):
         pygame.draw.rect(surface, color, (legend_x, legend_y + i * legend_spacing, cell_size, cell_size))
         draw_text(text, font, BLACK, surface, legend_x + cell_size // 2, legend_y + i * legend_spacing + cell_size // 2)
 
-def game_screen(screen, WIDTH, HEIGHT, font, num_teams, board=None, scores=None, current_player=None, first_word_placed=False, loading=False):
-    clock = pygame.time.Clock()
+def preview_lines(game, tiles):
+    '''
+    Lines describing what ending the turn with tiles would do, as
+    (text, color) pairs.
+    '''
+    if not tiles:
+        return []
+    # Never wait for the dictionary while drawing
+    if not game.dictionary.is_loaded():
+        return [('Loading...', WHITE)]
+    if any(not letter for _, _, letter, _ in tiles):
+        return [('Not a play', INVALID_COLOR)]
+
+    evaluation = evaluate_move(game.board, tiles, game.dictionary, game.first_word_placed)
+    words = evaluation.words
+    if evaluation.valid:
+        main_word = words[0] if len(words) == 1 else f'{words[0]} +{len(words) - 1}'
+        return [(main_word, HIGHLIGHT_COLOR), (f'{evaluation.score} pt' if evaluation.score == 1 else f'{evaluation.score} pts', HIGHLIGHT_COLOR)]
+    unknown = [word for word in words if word not in game.dictionary]
+    if unknown:
+        return [(unknown[0], INVALID_COLOR), ('Not a word', INVALID_COLOR)]
+    return [('Not a play', INVALID_COLOR)]
+
+def draw_preview(surface, font, rect, lines):
+    '''
+    Draws the preview of the current play, returns the area it covers.
+    '''
+    pygame.draw.rect(surface, BLACK, rect)
+    for i, (line, color) in enumerate(lines):
+        draw_text(line, font, color, surface, rect.centerx, rect.y + (2 * i + 1) * font.get_linesize() // 2)
+    return rect
+
+def draw_metrics(surface, font, rect, lines):
+    '''
+    Draws the instrumentation overlay, returns the area it covers.
+    '''
+    pygame.draw.rect(surface, BLACK, rect)
+    for i, line in enumerate(lines):
+        draw_text(line, font, HIGHLIGHT_COLOR, surface, rect.x, rect.y + i * font.get_linesize(), align='topleft')
+    return rect
+
+def game_screen(screen, WIDTH, HEIGHT, font, num_teams, board=None, scores=None, current_player=None, first_word_placed=False, loading=False, turn=0, layout=None):
     game = None
     # Start a new game
     if not loading:
-        game = Game(num_teams)
+        game = Game(num_teams, layout=layout)
     # Load saved game
     else:
-        game = Game(num_teams, board, scores, current_player, first_word_placed, loading=True)
+        game = Game(num_teams, board, scores, current_player, first_word_placed, loading=True, turn=turn)
 
     # Load dictionary
-    game.load_dictionary('word_list.pkl')
+    game.load_dictionary('word_list.lex')
 
     # Game board setup
     CELL_SIZE = HEIGHT // game.board.size
@@ -143,6 +260,9 @@ def game_screen(screen, WIDTH, HEIGHT, font, num_teams, board=None, scores=None,
     # Define the end turn button rectangle (bottom right)
     end_turn_rect = pygame.Rect(WIDTH - BUTTON_WIDTH - 20, HEIGHT - BUTTON_HEIGHT - 20, BUTTON_WIDTH, BUTTON_HEIGHT)
 
+    # Define the hint button rectangle (above the end turn button)
+    hint_rect = pygame.Rect(WIDTH - BUTTON_WIDTH - 20, HEIGHT - 2 * BUTTON_HEIGHT - 40, BUTTON_WIDTH, BUTTON_HEIGHT)
+
     # Define the quit button rectangle (top right)
     quit_rect = pygame.Rect(WIDTH - BUTTON_WIDTH - 20, 20, BUTTON_WIDTH, BUTTON_HEIGHT)
 
@@ -155,77 +275,246 @@ def game_screen(screen, WIDTH, HEIGHT, font, num_teams, board=None, scores=None,
     blank_tile_input = False
     blank_tile_text = ''
     blank_tile_pos = None
-    
-    while True:
-        screen.fill(BLACK)  # Fill the screen with black
 
-        # Handle events
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
+    # Define hint variables, hints are searched for in the background and
+    # hint_event is posted when they are ready
+    hint_input = False
+    hint_rack = ''
+    hint_event = pygame.event.custom_type()
+    hints = HintEngine(game.dictionary, on_done=lambda: pygame.event.post(pygame.event.Event(hint_event)))
+    hint_y = quit_rect.bottom + font.get_linesize()
+
+    # Preview of the play being typed (above the hint button), worked out
+    # again only when the placed tiles change
+    preview_rect = pygame.Rect(board_x + game.board.size * CELL_SIZE, hint_rect.top - 2 * font.get_linesize() - 10, WIDTH - board_x - game.board.size * CELL_SIZE, 2 * font.get_linesize())
+    preview_key = None
+    preview = []
+
+    # Instrumentation overlay (bottom left), toggled with F3 when metrics are on
+    metrics = game.metrics
+    show_metrics = False
+    metrics_rect = pygame.Rect(10, HEIGHT - 4 * font.get_linesize() - 10, board_x - 20, 4 * font.get_linesize())
+
+    # Layers for drawing only what changed
+    background = pygame.Surface((WIDTH, HEIGHT))
+    renderer = BoardRenderer(game.board, board_x, board_y, CELL_SIZE, font)
+    last_turn_state = None
+    dictionary_loaded = False
+
+    def handle_event(event):
+        nonlocal blank_tile_input, blank_tile_text, blank_tile_pos, last_turn_state, hint_input, hint_rack, show_metrics
+        if event.type in EXPOSE_EVENTS:
+            # Window contents were lost, draw everything again
+            last_turn_state = None
+        elif event.type == hint_event:
+            last_turn_state = None
+            return True
+        elif event.type == pygame.QUIT:
+            hints.cancel()
+            game.close()
+            pygame.quit()
+            sys.exit()
+        elif event.type == pygame.MOUSEBUTTONDOWN:
+            mouse_x, mouse_y = event.pos
+            # Check if 'End Turn' button is clicked
+            if end_turn_rect.collidepoint(mouse_x, mouse_y):
+                # Hints are for the board before this turn
+                hints.cancel()
+                hint_input = False
+                game.end_turn()
+                last_turn_state = None
+                return True
+            # Check if 'Hint' button is clicked, the rack is typed in next
+            elif hint_rect.collidepoint(mouse_x, mouse_y):
+                hints.cancel()
+                hint_input = True
+                hint_rack = ''
+                game.active_tile = None
+                last_turn_state = None
+                return True
+            # Check if 'Quit' button is clicked
+            elif quit_rect.collidepoint(mouse_x, mouse_y):
+                hints.cancel()
+                game.close()
                 pygame.quit()
                 sys.exit()
-            elif event.type == pygame.MOUSEBUTTONDOWN:
-                mouse_x, mouse_y = event.pos
-                # Check if 'End Turn' button is clicked
-                if end_turn_rect.collidepoint(mouse_x, mouse_y):
-                    game.end_turn()
-                # Check if 'Quit' button is clicked
-                elif quit_rect.collidepoint(mouse_x, mouse_y):
-                    pygame.quit()
-                    sys.exit()
-                # Check if cell is clicked
-                else:
-                    col = (mouse_x - board_x) // CELL_SIZE
-                    row = (mouse_y - board_y) // CELL_SIZE
-                    if 0 <= row < game.board.size and 0 <= col < game.board.size and not game.board.get_cell(row, col).locked:
-                        game.active_tile = (row, col)
-            elif event.type == pygame.KEYDOWN and game.active_tile:
-                row, col = game.active_tile
-                # Check for letter deletion
-                if event.key == pygame.K_BACKSPACE:
-                    game.board.set_letter(row, col, '')
-                    game.placed_tiles = [(r, c) for r, c in game.placed_tiles if (r, c) != (row, col)]
-                # Check for blank tile use
-                elif blank_tile_input:
-                    if event.key == pygame.K_RETURN:
-                        game.board.set_letter(blank_tile_pos[0], blank_tile_pos[1], blank_tile_text, blank=True)
-                        blank_tile_input = False
-                        blank_tile_text = ''
-                        blank_tile_pos = None
-                    else:
-                        blank_tile_text = event.unicode.upper()
-                # Check for letter tile use
+            # Check if cell is clicked
+            else:
+                col = (mouse_x - board_x) // CELL_SIZE
+                row = (mouse_y - board_y) // CELL_SIZE
+                if 0 <= row < game.board.size and 0 <= col < game.board.size and not game.board.get_cell(row, col).locked:
+                    game.active_tile = (row, col)
+                    if hint_input:
+                        hint_input = False
+                        last_turn_state = None
+                    return True
+        elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3 and metrics:
+            show_metrics = not show_metrics
+            last_turn_state = None
+            return True
+        elif event.type == pygame.KEYDOWN and event.key in (pygame.K_z, pygame.K_y) and event.mod & pygame.KMOD_CTRL:
+            # Ctrl+Z takes back the last turn, Ctrl+Y plays it again
+            hints.cancel()
+            hint_input = False
+            blank_tile_input = False
+            blank_tile_pos = None
+            if event.key == pygame.K_z:
+                game.undo()
+            else:
+                game.redo()
+            last_turn_state = None
+            return True
+        elif event.type == pygame.KEYDOWN and hint_input:
+            # Typing the rack to get hints for
+            if event.key == pygame.K_RETURN:
+                if hint_rack:
+                    hints.request(game.board, hint_rack, game.board_version)
+                hint_input = False
+            elif event.key == pygame.K_ESCAPE:
+                hint_input = False
+            elif event.key == pygame.K_BACKSPACE:
+                hint_rack = hint_rack[:-1]
+            else:
+                char = event.unicode.upper()
+                if len(hint_rack) < 7 and len(char) == 1 and (char == '_' or char.isalpha()):
+                    hint_rack += char
+            last_turn_state = None
+            return True
+        elif event.type == pygame.KEYDOWN and game.active_tile:
+            row, col = game.active_tile
+            # Check for letter deletion
+            if event.key == pygame.K_BACKSPACE:
+                game.board.set_letter(row, col, '')
+                game.placed_tiles = [(r, c) for r, c in game.placed_tiles if (r, c) != (row, col)]
+            # Check for blank tile use
+            elif blank_tile_input:
+                if event.key == pygame.K_RETURN:
+                    game.board.set_letter(blank_tile_pos[0], blank_tile_pos[1], blank_tile_text, blank=True)
+                    blank_tile_input = False
+                    blank_tile_text = ''
+                    blank_tile_pos = None
                 else:
-                    char = event.unicode.upper()
-                    if not game.board.get_cell(row, col).locked:
-                        if char == '_':
-                            blank_tile_input = True
-                            blank_tile_pos = (row, col)
-                        elif char.isalpha() and len(char) == 1:
-                                game.board.set_letter(row, col, char)
-                        if (row, col) not in game.placed_tiles:
-                            game.placed_tiles.append((row, col))
-
-        # Draw board
-        draw_board(game.board, board_x, board_y, CELL_SIZE, screen, font, game.active_tile, game.placed_tiles)
-
-        # Draw team scores
-        draw_team_scores(game, screen, font, team_x,  team_y, spacing)
-
-        # Draw 'End Turn' button
-        draw_button(screen, font, end_turn_rect, 'END TURN')
-
-        # Draw 'Quit' button
-        draw_button(screen, font, quit_rect, 'QUIT')
-
-        # Draw legend for special tiles
-        draw_legend(screen, font, legend_x, legend_y, legend_spacing, CELL_SIZE)
-
-        # Draw the input box for blank tile
-        if blank_tile_input:
-            pygame.draw.rect(screen, WHITE, (board_x + blank_tile_pos[1] * CELL_SIZE, board_y + blank_tile_pos[0] * CELL_SIZE, CELL_SIZE, CELL_SIZE))
-            draw_text(blank_tile_text, font, BLACK, screen, board_x + blank_tile_pos[1] * CELL_SIZE + CELL_SIZE // 2, board_y + blank_tile_pos[0] * CELL_SIZE + CELL_SIZE // 2)
-        
+                    blank_tile_text = event.unicode.upper()
+            # Check for letter tile use
+            else:
+                char = event.unicode.upper()
+                if not game.board.get_cell(row, col).locked:
+                    if char == '_':
+                        blank_tile_input = True
+                        blank_tile_pos = (row, col)
+                    elif char.isalpha() and len(char) == 1:
+                            game.board.set_letter(row, col, char)
+                    if (row, col) not in game.placed_tiles:
+                        game.placed_tiles.append((row, col))
+            return True
+        return False
+
+    def render():
+        nonlocal last_turn_state
+        if metrics:
+            start = time.perf_counter()
+
+        # Redraw the static parts of the screen when a turn ends
+        turn_state = (tuple(game.scores), game.current_player)
+        full_redraw = turn_state != last_turn_state
+        if full_redraw:
+            last_turn_state = turn_state
+            background.fill(BLACK)
+
+            # Draw team scores
+            draw_team_scores(game, background, font, team_x,  team_y, spacing)
+
+            # Draw 'End Turn' button
+            draw_button(background, font, end_turn_rect, 'END TURN')
+
+            # Draw 'Hint' button
+            draw_button(background, font, hint_rect, 'HINT')
+
+            # Draw 'Quit' button
+            draw_button(background, font, quit_rect, 'QUIT')
+
+            # Draw the rack being typed in or the hints found for it
+            for i, line in enumerate(hint_lines()):
+                draw_text(line, font, WHITE, background, hint_rect.centerx, hint_y + i * font.get_linesize())
+
+            # Draw legend for special tiles
+            draw_legend(background, font, legend_x, legend_y, legend_spacing, CELL_SIZE)
+
+            # Draw loading indicator
+            if not game.dictionary.is_loaded():
+                draw_text('Loading...', font, WHITE, background, team_x, HEIGHT - BUTTON_HEIGHT)
+
+        # Redraw the cached board if tiles were locked
+        if renderer.refresh(game.board_version):
+            full_redraw = True
+
+        if full_redraw:
+            screen.blit(background, (0, 0))
+            renderer.draw_layer(screen)
+
+        # Draw tiles of the current turn and the input box for blank tile
+        dirty_rects = renderer.draw_overlay(screen, game.active_tile, game.placed_tiles, blank_tile_pos if blank_tile_input else None, blank_tile_text)
+
+        # Draw whether the play is valid and what it scores
+        dirty_rects.append(draw_preview(screen, font, preview_rect, current_preview()))
+
+        # Draw the timings of the last turn and frames
+        if show_metrics:
+            dirty_rects.append(draw_metrics(screen, font, metrics_rect, metrics.overlay_lines()))
+
         # Update the display
-        pygame.display.flip()
-        clock.tick(60)
+        if full_redraw:
+            pygame.display.flip()
+        else:
+            pygame.display.update(dirty_rects)
+
+        if metrics:
+            metrics.frame(time.perf_counter() - start)
+
+    def current_preview():
+        nonlocal preview_key, preview
+        tiles = []
+        for row, col in game.placed_tiles:
+            # Skip the square a blank is being typed into
+            if blank_tile_input and (row, col) == blank_tile_pos:
+                continue
+            cell = game.board.get_cell(row, col)
+            tiles.append((row, col, cell.letter, cell.blank))
+        key = (tuple(tiles), game.board_version, game.dictionary.is_loaded())
+        if key != preview_key:
+            preview_key = key
+            preview = preview_lines(game, tiles)
+        return preview
+
+    def hint_lines():
+        if hint_input:
+            return ['Rack:', hint_rack + '|']
+        if hints.searching():
+            return ['Searching...']
+        result = hints.results()
+        if result is None:
+            return []
+        version, moves, _ = result
+        if version != game.board_version:
+            return []
+        if moves is None:
+            return ['Hint failed']
+        if not moves:
+            return ['No plays']
+        return [move_label(game.board, move) for move in moves]
+
+    def poll():
+        # Redraw once the dictionary has loaded to take the indicator away,
+        # and build the board's cross-checks with it
+        nonlocal dictionary_loaded, last_turn_state
+        if metrics:
+            metrics.maybe_dump()
+        if not dictionary_loaded and game.dictionary.is_loaded():
+            dictionary_loaded = True
+            if game.dictionary.error is None:
+                game.build_cross_checks()
+            last_turn_state = None
+            return True
+        return False
+
+    screen_loop(handle_event, render, poll)
@@ -0,0 +1,128 @@
+import threading
+import time
+import traceback
+from back import CompactBoard
+from dictionary import LazyDictionary
+from movegen import MoveGenerator, distinct_moves
+
+class HintEngine:
+    '''
+    Looks for the best plays of a rack in a background thread.
+
+    Every search gets a time budget and keeps the best moves found when it
+    runs out. Starting a new search or calling cancel (when the board
+    changes) stops the one in progress. on_done, if given, is called from
+    the search thread when results are ready or the search failed.
+    '''
+    def __init__(self, dictionary, budget=0.2, top_n=3, on_done=None):
+        self.dictionary = dictionary
+        self.budget = budget
+        self.top_n = top_n
+        self.on_done = on_done
+        self.generator = None
+        self.condition = threading.Condition()
+        # Bumped by every request and cancel, a search stops once it changes
+        self.generation = 0
+        self.job = None
+        self.result = None
+        self.thread = None
+
+    def request(self, board, rack, version=None):
+        '''
+        Start looking for the best plays of rack on board, '_' for blanks.
+        version is handed back with the results to tell them apart.
+        '''
+        # The search runs on its own copy of the board
+        snapshot = CompactBoard.from_board(board)
+        with self.condition:
+            self.generation += 1
+            self.job = (self.generation, snapshot, rack, version)
+            self.result = None
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, name='hint-engine', daemon=True)
+                self.thread.start()
+            self.condition.notify()
+
+    def cancel(self):
+        '''
+        Stop the search in progress and forget any results.
+        '''
+        with self.condition:
+            self.generation += 1
+            self.job = None
+            self.result = None
+
+    def searching(self):
+        with self.condition:
+            return self.job is not None
+
+    def results(self):
+        '''
+        The last finished search as (version, moves, complete), complete
+        being False if the time budget ran out first and moves None if the
+        search failed. None while searching.
+        '''
+        with self.condition:
+            return self.result
+
+    def run(self):
+        while True:
+            with self.condition:
+                while self.job is None:
+                    self.condition.wait()
+                generation, board, rack, version = self.job
+
+            try:
+                if self.generator is None:
+                    gaddag = None
+                    if isinstance(self.dictionary, LazyDictionary):
+                        # Waits for the GADDAG the dictionary loader opens,
+                        # the generator builds it if there was none
+                        gaddag = self.dictionary.get_gaddag()
+                    self.generator = MoveGenerator(self.dictionary, gaddag)
+
+                # The budget starts once the generator is ready
+                deadline = time.perf_counter() + self.budget
+                timed_out = False
+
+                def stop():
+                    nonlocal timed_out
+                    if self.generation != generation:
+                        return True
+                    if time.perf_counter() > deadline:
+                        timed_out = True
+                        return True
+                    return False
+
+                moves = self.best(self.generator.generate(board, rack, stop))
+            except Exception:
+                # Report the failure instead of searching forever
+                traceback.print_exc()
+                moves = None
+                timed_out = True
+
+            with self.condition:
+                if self.generation != generation:
+                    # Cancelled or replaced, drop what was found
+                    continue
+                self.job = None
+                self.result = (version, moves, not timed_out)
+            if self.on_done:
+                self.on_done()
+
+    def best(self, moves):
+        return distinct_moves(moves, self.top_n)
+
+def move_label(board, move):
+    '''
+    Short name for a move in board coordinates, like 'CAT 8H 10' for a
+    word across from row 8 column H, or 'CAT H8 10' for a word down.
+    '''
+    row, col = move.tiles[0][:2]
+    dr, dc = (0, 1) if move.horizontal else (1, 0)
+    # The word may start on tiles already on the board
+    while row - dr >= 0 and col - dc >= 0 and board.has_tile(row - dr, col - dc):
+        row, col = row - dr, col - dc
+    column = chr(ord('A') + col)
+    square = f'{row + 1}{column}' if move.horizontal else f'{column}{row + 1}'
+    return f'{move.word} {square} {move.score}'
@@ -0,0 +1,97 @@
+import struct
+
+# One square filled by a turn: square index, letter code and flags
+# (bit 0 the blank flag, the rest the bonus code it had before the turn)
+TILE = struct.Struct('<HBB')
+
+def pack_tiles(tiles):
+    '''
+    Packs (index, letter, blank, bonus code) tuples into 4 bytes each.
+    '''
+    return b''.join(TILE.pack(index, ord(letter), blank | (bonus << 1)) for index, letter, blank, bonus in tiles)
+
+def unpack_tiles(packed):
+    return [(index, chr(letter), bool(flags & 1), flags >> 1) for index, letter, flags in TILE.iter_unpack(packed)]
+
+class Turn:
+    '''
+    One entry of the history: the squares the turn filled, the game state
+    after it, and the turn before it.
+    '''
+    __slots__ = ('parent', 'tiles', 'state')
+
+    def __init__(self, parent, tiles, state):
+        self.parent = parent
+        self.tiles = tiles
+        self.state = state
+
+class TurnHistory:
+    '''
+    Undo and redo of whole turns.
+
+    Turns form a persistent linked list, each one pointing at the turn
+    before it and keeping only the squares it filled, so earlier states
+    are shared rather than copied and undo or redo only touches the squares
+    of one turn. Starting a new turn after undoing drops the redo list.
+    state is whatever the game needs to restore besides the board, it
+    should be immutable.
+    '''
+    def __init__(self, state):
+        self.current = Turn(None, b'', state)
+        self.undone = []
+
+    def push(self, tiles, state):
+        '''
+        Add a finished turn, tiles as (index, letter, blank, bonus code).
+        '''
+        self.current = Turn(self.current, pack_tiles(tiles), state)
+        self.undone.clear()
+
+    def can_undo(self):
+        return self.current.parent is not None
+
+    def can_redo(self):
+        return bool(self.undone)
+
+    def undo(self):
+        '''
+        Step back one turn. Returns the tiles to take off the board and
+        the state to go back to, or None at the start of the history.
+        '''
+        turn = self.current
+        if turn.parent is None:
+            return None
+        self.current = turn.parent
+        self.undone.append(turn)
+        return unpack_tiles(turn.tiles), self.current.state
+
+    def redo(self):
+        '''
+        Step forward one undone turn. Returns the tiles to put back and
+        the state after the turn, or None if nothing was undone.
+        '''
+        if not self.undone:
+            return None
+        turn = self.undone.pop()
+        self.current = turn
+        return unpack_tiles(turn.tiles), turn.state
+
+    def __len__(self):
+        # Turns that can be undone
+        count = 0
+        turn = self.current
+        while turn.parent is not None:
+            count += 1
+            turn = turn.parent
+        return count
+
+    def tile_bytes(self):
+        '''
+        Bytes used by the packed tiles of every turn, undone ones included.
+        '''
+        total = sum(len(turn.tiles) for turn in self.undone)
+        turn = self.current
+        while turn is not None:
+            total += len(turn.tiles)
+            turn = turn.parent
+        return total
@@ -0,0 +1,112 @@
+import json
+import os
+
+def journal_path(snapshot_path):
+    '''
+    Journal file that goes with a snapshot, 'scrabble_game.journal'
+    for 'scrabble_game.json'.
+    '''
+    return os.path.splitext(snapshot_path)[0] + '.journal'
+
+class TurnJournal:
+    '''
+    Append-only log of turns written on top of a periodic snapshot.
+
+    Every turn appends one JSON line with only what changed (the player,
+    the tiles locked and the points scored). Lines are fsynced in batches
+    of sync_every, and every compact_every turns the whole game is written
+    to the snapshot and the journal starts over.
+    '''
+    def __init__(self, snapshot_path='scrabble_game.json', sync_every=8, compact_every=50):
+        self.snapshot_path = snapshot_path
+        self.path = journal_path(snapshot_path)
+        self.sync_every = sync_every
+        self.compact_every = compact_every
+        repair_journal(self.path)
+        self.file = open(self.path, 'a')
+        self.unsynced = 0
+        self.records = 0
+
+    def append(self, game, record):
+        '''
+        Log one turn, compacting into a new snapshot when the journal is long.
+        '''
+        # One write per line, so a crash can at most tear the last line
+        self.file.write(json.dumps(record, separators=(',', ':')) + '\n')
+        self.unsynced += 1
+        self.records += 1
+        if self.records >= self.compact_every:
+            self.compact(game)
+        elif self.unsynced >= self.sync_every:
+            self.sync()
+
+    def sync(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.unsynced = 0
+
+    def compact(self, game):
+        '''
+        Write the whole game to the snapshot and empty the journal.
+        '''
+        self.sync()
+        game.save_game(self.snapshot_path)
+        # Records up to the snapshot's turn are skipped on load, so a crash
+        # before the truncate below can't apply a turn twice
+        self.file.truncate(0)
+        self.file.seek(0)
+        self.records = 0
+
+    def close(self):
+        if not self.file.closed:
+            self.sync()
+            self.file.close()
+
+def repair_journal(path):
+    '''
+    Cut a torn last line (from a crash mid-write) off the journal, so the
+    next record starts on a line of its own.
+    '''
+    if not os.path.exists(path):
+        return
+    with open(path, 'rb+') as file:
+        data = file.read()
+        end = data.rfind(b'\n') + 1
+        if end < len(data):
+            file.truncate(end)
+
+def read_journal(path, after_turn=0):
+    '''
+    Read the journal records newer than a snapshot's turn.
+    '''
+    records = []
+    if not os.path.exists(path):
+        return records
+    with open(path, 'r') as file:
+        lines = file.readlines()
+    for i, line in enumerate(lines):
+        try:
+            record = json.loads(line)
+        except ValueError:
+            if i == len(lines) - 1:
+                # Torn final line from a crash mid-write
+                break
+            # A torn line from an earlier crash, the turns after it still count
+            continue
+        if record['turn'] > after_turn:
+            records.append(record)
+    return records
+
+def apply_records(board, scores, current_player, first_word_placed, turn, records):
+    '''
+    Replay journal records onto a board and scores loaded from a snapshot.
+    Returns the updated (current_player, first_word_placed, turn).
+    '''
+    for record in records:
+        for row, col, letter, blank in record['tiles']:
+            board.set_cell(row, col, letter, blank, locked=True)
+            first_word_placed = True
+        scores[record['player']] += record['score']
+        current_player = (record['player'] + 1) % len(scores)
+        turn = record['turn']
+    return current_player, first_word_placed, turn
@@ -0,0 +1,216 @@
+import argparse
+import array
+import json
+import struct
+import sys
+from itertools import combinations_with_replacement
+from back import TILE_DISTRIBUTION
+from mapped_file import MappedFile, write_file
+from tile_tracker import KIND_INDEX, TILE_KINDS, binomial
+
+# File layout: a fixed-size header followed by one little-endian int16 for
+# every multiset of up to MAX_LEAVE tiles, the leave value in hundredths of
+# a point. The value of a leave lives at HEADER_SIZE + 2 * leave_rank(leave).
+MAGIC = b'LEAV'
+HEADER = struct.Struct('<4sBBI')
+HEADER_SIZE = HEADER.size
+VALUE = struct.Struct('<h')
+SCALE = 100
+MAX_LEAVE = 6
+KINDS = len(TILE_KINDS)
+
+# Leaves of each size are ranked after all smaller ones, there are
+# C(KINDS - 1 + size, size) of every size
+OFFSETS = [0]
+for size in range(MAX_LEAVE + 1):
+    OFFSETS.append(OFFSETS[-1] + binomial(KINDS - 1 + size, size))
+LEAVE_COUNT = OFFSETS[-1]
+# RANK_TERMS[i][kind] is C(kind + i, i + 1), see rank_kinds
+RANK_TERMS = [[binomial(kind + i, i + 1) for kind in range(KINDS)] for i in range(MAX_LEAVE)]
+
+# Model features: the n-th copy of a tile kind, pairs of kinds, and the
+# number of tiles kept. Self-play only keeps many tiles when it can't play
+# them, so the next turn scores less after big leaves whatever they hold.
+# The size features take that up and are left out of the values.
+SINGLES = KINDS * MAX_LEAVE
+SIZE_FEATURE = SINGLES + KINDS * KINDS
+FEATURES = SIZE_FEATURE + MAX_LEAVE + 1
+
+# Leave values are blended with what was seen of that leave, counting the
+# model as this many games' worth
+PRIOR = 30
+
+def rank_kinds(kinds):
+    '''
+    Rank of a sorted list of tile kind indexes. Adding i to the i-th kind
+    makes them distinct, and distinct sets of a size are ranked in colex
+    order: the sum of C(kind + i, i + 1).
+    '''
+    rank = OFFSETS[len(kinds)]
+    for i, kind in enumerate(kinds):
+        rank += RANK_TERMS[i][kind]
+    return rank
+
+def leave_rank(leave):
+    '''
+    Position of a leave ('_' for blanks) among all multisets of up to
+    MAX_LEAVE tiles, in 0 to LEAVE_COUNT - 1.
+    '''
+    if len(leave) > MAX_LEAVE:
+        raise ValueError(f'leaves have at most {MAX_LEAVE} tiles')
+    return rank_kinds(sorted(KIND_INDEX[tile] for tile in leave.upper()))
+
+class LeaveTable(MappedFile):
+    '''
+    Leave values read in place through a memory map.
+    '''
+    def __init__(self, file_path='leaves.bin'):
+        super().__init__(file_path)
+
+    def read_header(self):
+        magic, max_leave, kinds, count = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC or max_leave != MAX_LEAVE or kinds != KINDS or count != LEAVE_COUNT:
+            raise ValueError(f'{self.file_path} is not a leave table')
+
+    def value(self, leave):
+        '''
+        Points a leave is worth on the next turn over an average one of
+        the same size.
+        '''
+        return VALUE.unpack_from(self.data, HEADER_SIZE + 2 * leave_rank(leave))[0] / SCALE
+
+def write_table(values, file_path):
+    '''
+    Writes leave values (points, in rank order) to a table file.
+    '''
+    table = array.array('h', (max(-32768, min(32767, round(value * SCALE))) for value in values))
+    if sys.byteorder == 'big':
+        table.byteswap()
+
+    def write(file):
+        file.write(HEADER.pack(MAGIC, MAX_LEAVE, KINDS, len(table)))
+        table.tofile(file)
+
+    write_file(file_path, write)
+
+def leave_samples(file_paths):
+    '''
+    Reads self-play games written by simulate.py and returns
+    {sorted kinds of a leave: [times seen, total points]}, the points
+    being what the player scored on their next turn with that leave.
+    Leaves kept near the end of the game, when the bag can't refill the
+    rack, are left out.
+    '''
+    samples = {}
+    for file_path in file_paths:
+        with open(file_path, 'r') as file:
+            for line in file:
+                game = json.loads(line)
+                num_teams = len(game['scores'])
+                moves = game['moves']
+                bag = sum(TILE_DISTRIBUTION.values()) - 7 * num_teams
+                for i, move in enumerate(moves):
+                    if move['action'] != 'play':
+                        continue
+                    bag -= min(len(move['tiles']), bag)
+                    later = [other for other in moves[i + 1:] if other['player'] == move['player']]
+                    if bag < 7 or not later or 'rack' not in move:
+                        continue
+                    leave = list(move['rack'])
+                    for _, _, letter, blank in move['tiles']:
+                        leave.remove('_' if blank else letter)
+                    if len(leave) > MAX_LEAVE:
+                        continue
+                    key = tuple(sorted(KIND_INDEX[tile] for tile in leave))
+                    sample = samples.setdefault(key, [0, 0])
+                    sample[0] += 1
+                    sample[1] += later[0]['score']
+    return samples
+
+def features(kinds):
+    found = []
+    copies = {}
+    for kind in kinds:
+        copies[kind] = copies.get(kind, 0) + 1
+        found.append(kind * MAX_LEAVE + copies[kind] - 1)
+    distinct = sorted(copies)
+    for i, first in enumerate(distinct):
+        for second in distinct[i + 1:]:
+            found.append(SINGLES + first * KINDS + second)
+    return found
+
+def fit(samples, rounds=30, shrink=20.0):
+    '''
+    Fits a value to every tile copy, pair of tiles and leave size so that
+    a leave is worth the sum of its features, by ridge regression
+    (coordinate descent) on the samples. Only the tile weights are shrunk
+    towards 0. Returns the feature weights and the average next turn score
+    the values are relative to.
+    '''
+    seen = sum(count for count, _ in samples.values())
+    average = sum(total for _, total in samples.values()) / seen
+    groups = []
+    members = {}
+    for kinds, (count, total) in samples.items():
+        # Residual of a group is the sum over its samples
+        groups.append([count, total - count * average])
+        for feature in features(kinds) + [SIZE_FEATURE + len(kinds)]:
+            members.setdefault(feature, []).append(len(groups) - 1)
+
+    weights = [0.0] * FEATURES
+    for _ in range(rounds):
+        for feature, group_indexes in members.items():
+            count = sum(groups[i][0] for i in group_indexes)
+            residual = sum(groups[i][1] for i in group_indexes)
+            penalty = shrink if feature < SIZE_FEATURE else 0
+            change = (residual - penalty * weights[feature]) / (count + penalty)
+            weights[feature] += change
+            for i in group_indexes:
+                groups[i][1] -= change * groups[i][0]
+    return weights, average
+
+def leave_values(samples, weights, average):
+    '''
+    Values of every leave in rank order: the model, pulled towards the
+    average seen for leaves that came up often, both over the average of
+    leaves of the same size.
+    '''
+    values = [0.0] * LEAVE_COUNT
+    for size in range(MAX_LEAVE + 1):
+        baseline = average + weights[SIZE_FEATURE + size]
+        for kinds in combinations_with_replacement(range(KINDS), size):
+            value = sum(weights[feature] for feature in features(kinds))
+            sample = samples.get(kinds)
+            if sample:
+                count, total = sample
+                value = (total - count * baseline + PRIOR * value) / (count + PRIOR)
+            values[rank_kinds(kinds)] = value
+    return values
+
+def build_table(file_paths, output='leaves.bin'):
+    samples = leave_samples(file_paths)
+    weights, average = fit(samples)
+    write_table(leave_values(samples, weights, average), output)
+    return {
+        'samples': sum(count for count, _ in samples.values()),
+        'distinct_leaves': len(samples),
+        'average_next_score': average,
+    }
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Build the rack leave value table from self-play games.')
+    parser.add_argument('games_files', nargs='*', help='output of simulate.py, games are played first if none given')
+    parser.add_argument('--games', type=int, default=6000, help='self-play games to play')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--dictionary', default='word_list.lex')
+    parser.add_argument('--output', default='leaves.bin')
+    args = parser.parse_args()
+
+    games_files = args.games_files
+    if not games_files:
+        from simulate import simulate
+
+        print(json.dumps(simulate(args.games, 'simulation.jsonl', args.seed, 2, args.workers, args.dictionary)))
+        games_files = ['simulation.jsonl']
+    print(json.dumps(build_table(games_files, args.output)))
@@ -0,0 +1,129 @@
+import pickle
+import struct
+import sys
+from mapped_file import MappedFile, write_file
+
+# File layout: a fixed-size header followed by `count` sorted records of
+# `width` bytes each. Words shorter than `width` are padded with NUL bytes,
+# which sort before every letter, so the records compare exactly like the
+# words themselves and record i lives at HEADER_SIZE + i * width.
+MAGIC = b'LEX1'
+HEADER = struct.Struct('<4sHI')
+HEADER_SIZE = HEADER.size
+
+def compile_lexicon(words, file_path, width=None):
+    '''
+    Writes words to a compiled lexicon file.
+    '''
+    records = sorted({word.encode('ascii') for word in words})
+    if width is None:
+        width = max((len(record) for record in records), default=1)
+
+    def write(file):
+        file.write(HEADER.pack(MAGIC, width, len(records)))
+        for record in records:
+            if len(record) > width:
+                raise ValueError(f'{record.decode()} is longer than {width} letters')
+            file.write(record.ljust(width, b'\0'))
+
+    write_file(file_path, write)
+
+class Lexicon(MappedFile):
+    '''
+    Read-only word list queried in place through a memory map.
+    '''
+    def read_header(self):
+        magic, self.width, self.count = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC:
+            raise ValueError(f'{self.file_path} is not a compiled lexicon')
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        for i in range(self.count):
+            yield self.record(i).rstrip(b'\0').decode('ascii')
+
+    def __contains__(self, word):
+        key = self.encode(word)
+        if key is None or len(key) > self.width:
+            return False
+        key = key.ljust(self.width, b'\0')
+        i = self.lower_bound(key)
+        return i < self.count and self.record(i) == key
+
+    def encode(self, word):
+        try:
+            return word.encode('ascii')
+        except UnicodeEncodeError:
+            return None
+
+    def record(self, i):
+        start = HEADER_SIZE + i * self.width
+        return self.data[start:start + self.width]
+
+    def lower_bound(self, key, lo=0, hi=None):
+        '''
+        Index of the first record that is not less than key.
+        '''
+        if hi is None:
+            hi = self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.record(mid)[:len(key)] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def prefix_range(self, prefix):
+        '''
+        Range of record indices whose words start with prefix.
+        '''
+        key = self.encode(prefix)
+        if key is None or len(key) > self.width:
+            return 0, 0
+        lo = self.lower_bound(key)
+        hi = lo
+        # Everything that starts with prefix sorts before prefix followed by 0xFF
+        if lo < self.count:
+            hi = self.lower_bound(key + b'\xff', lo)
+        return lo, hi
+
+    def has_prefix(self, prefix):
+        '''
+        Checks if any word starts with prefix.
+        '''
+        lo, hi = self.prefix_range(prefix)
+        return lo < hi
+
+    def words_with_prefix(self, prefix):
+        '''
+        Gets all words that start with prefix, in sorted order.
+        '''
+        lo, hi = self.prefix_range(prefix)
+        return [self.record(i).rstrip(b'\0').decode('ascii') for i in range(lo, hi)]
+
+class KnownWords:
+    '''
+    Remembers dictionary lookups. The search keeps updating cross-checks
+    around the same squares, asking for the same words again and again.
+    '''
+    def __init__(self, dictionary, size=1000000):
+        self.dictionary = dictionary
+        self.size = size
+        self.known = {}
+
+    def __contains__(self, word):
+        known = self.known.get(word)
+        if known is None:
+            if len(self.known) >= self.size:
+                self.known.clear()
+            known = self.known[word] = word in self.dictionary
+        return known
+
+if __name__ == '__main__':
+    # Usage: python lexicon.py word_list.pkl word_list.lex
+    source, target = sys.argv[1], sys.argv[2]
+    with open(source, 'rb') as file:
+        compile_lexicon(pickle.load(file), target)
@@ -0,0 +1,116 @@
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from benchmark import CORPUS_PATH, load_corpus
+
+# Next to this file, wherever it is run from
+SERVER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'server.py')
+
+class Client:
+    '''
+    One connection to the game server, sending a request and waiting for
+    its response.
+    '''
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    async def request(self, **request):
+        self.writer.write(json.dumps(request, separators=(',', ':')).encode() + b'\n')
+        await self.writer.drain()
+        response = json.loads(await self.reader.readline())
+        if not response['ok']:
+            raise RuntimeError(response['error'])
+        return response
+
+    def close(self):
+        self.writer.close()
+
+async def play(host, port, records, num_teams, latencies, results):
+    '''
+    Replays a recorded game through the server, timing every move.
+    '''
+    client = Client(*await asyncio.open_connection(host, port))
+    try:
+        game = (await client.request(op='new', teams=num_teams))['game']
+        for record in records:
+            start = time.perf_counter()
+            if record['tiles']:
+                response = await client.request(op='play', game=game, player=record['player'], tiles=record['tiles'])
+                latencies.append(time.perf_counter() - start)
+                # The recorded game was played by the same rules
+                results['mismatches'] += not response['valid'] or response['score'] != record['score']
+            else:
+                await client.request(op='pass', game=game, player=record['player'])
+                latencies.append(time.perf_counter() - start)
+        await client.request(op='close', game=game)
+    finally:
+        client.close()
+
+async def start_server(dictionary_path):
+    '''
+    Starts server.py on a free port, returns the process and the port.
+    '''
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, SERVER_PATH, '--port', '0', '--dictionary', dictionary_path,
+        stdout=asyncio.subprocess.PIPE,
+    )
+    line = (await process.stdout.readline()).decode()
+    if not line.startswith('listening on '):
+        process.kill()
+        raise RuntimeError('server did not start')
+    return process, int(line.rsplit(':', 1)[1])
+
+async def run_load(clients=200, host='127.0.0.1', port=None, corpus_path=CORPUS_PATH, dictionary_path='word_list.lex'):
+    '''
+    Plays the corpus games with many concurrent clients and returns latency
+    and throughput statistics. Starts a server unless port is given.
+    '''
+    corpus = load_corpus(corpus_path)
+    process = None
+    if port is None:
+        process, port = await start_server(dictionary_path)
+
+    latencies = []
+    results = {'mismatches': 0}
+    try:
+        start = time.perf_counter()
+        await asyncio.gather(*[
+            play(host, port, corpus['games'][i % len(corpus['games'])]['records'], corpus['num_teams'], latencies, results)
+            for i in range(clients)
+        ])
+        seconds = time.perf_counter() - start
+    finally:
+        if process:
+            process.terminate()
+            await process.wait()
+
+    latencies.sort()
+    return {
+        'clients': clients,
+        'moves': len(latencies),
+        'seconds': seconds,
+        'moves_per_second': len(latencies) / seconds,
+        'latency_ms': {
+            'mean': statistics.fmean(latencies) * 1000,
+            'median': statistics.median(latencies) * 1000,
+            'p95': latencies[int(len(latencies) * 0.95)] * 1000,
+            'p99': latencies[int(len(latencies) * 0.99)] * 1000,
+            'max': latencies[-1] * 1000,
+        },
+        'mismatches': results['mismatches'],
+    }
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Put many simulated clients on the game server.')
+    parser.add_argument('--clients', type=int, default=200)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=None, help='server to use, one is started if not given')
+    parser.add_argument('--corpus', default=CORPUS_PATH)
+    parser.add_argument('--dictionary', default='word_list.lex')
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run_load(args.clients, args.host, args.port, args.corpus, args.dictionary)), indent=4))
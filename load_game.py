@@ -1,32 +1,38 @@
-import json
-from front import game_screen
-from back import Board
+from snapshot import read_game
+from journal import apply_records, journal_path, read_journal
 import os
 
+def read_saved_game(filename='scrabble_game.json'):
+    '''
+    Reads a saved game and replays the turns journaled since, without
+    pygame. Returns None if there is no saved game.
+    '''
+    if not os.path.exists(filename):
+        return None
+
+    data = read_game(filename)
+
+    # Replay the turns taken after the snapshot was written
+    records = read_journal(journal_path(filename), data['turn'])
+    current_player, first_word_placed, turn = apply_records(data['board'], data['scores'], data['current_player'], data['first_word_placed'], data['turn'], records)
+    data['current_player'] = current_player
+    data['first_word_placed'] = first_word_placed
+    data['turn'] = turn
+    return data
+
 def load_game(screen, WIDTH, HEIGHT, font):
     '''
-    Loads a game from 'scrabble_game.json'.
+    Loads a game from 'scrabble_game.json' and the turns journaled since.
     '''
-    filename = 'scrabble_game.json'
+    # Imported here so reading a save doesn't need pygame
+    from front import game_screen
+
+    data = read_saved_game('scrabble_game.json')
 
     # if file doesn't exist in current directory, go back to main menu
-    if not os.path.exists(filename):
+    if data is None:
         return
-    
-    with open(filename, 'r') as file:
-        data = json.load(file)
-        json_board = data['board']
-        scores = data['scores']
-        current_player = data['current_player']
-        first_word_placed = data['first_word_placed']
-        num_teams = len(scores)
-
-        # Convert board back into a grid of cells
-        board = Board()
-        for row in range(board.size):
-            for col in range(board.size):
-                cell = json_board[row][col]
-                board.set_cell(row, col, cell['letter'], cell['blank'], cell['locked'], cell['bonus'])
 
-        # Load game screen
-        game_screen(screen, WIDTH, HEIGHT, font, num_teams, board, scores, current_player, first_word_placed, loading=True)
\ No newline at end of file
+    # Load game screen
+    num_teams = len(data['scores'])
+    game_screen(screen, WIDTH, HEIGHT, font, num_teams, data['board'], data['scores'], data['current_player'], data['first_word_placed'], loading=True, turn=data['turn'])
\ No newline at end of file
@@ -3,9 +3,9 @@ import sys
 from rules_screen import rules_screen
 from teams_screen import teams_screen
 from load_game import load_game
-
-# Initialize pygame
-pygame.init()
+from dictionary import preload_dictionary
+from screen_loop import screen_loop
+from text_cache import draw_text
 
 # Constants
 BLUE = (20, 100, 150)
@@ -15,27 +15,30 @@ BLACK = (0, 0, 0)
 BUTTON_HEIGHT = 60
 BUTTON_MARGIN = 20
 
-# Create screen in fullscreen mode
-screen = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
-pygame.display.set_caption('Scrabble')
+# Screen, its dimensions and the font, set up by init_display so that
+# importing this module doesn't open a window
+screen = None
+WIDTH = HEIGHT = TILE_SIZE = FONT_SIZE = None
+font = None
 
-# Get screen dimensions
-WIDTH, HEIGHT = screen.get_size()
-TILE_SIZE = HEIGHT // 15
-FONT_SIZE = TILE_SIZE - 10
+def init_display():
+    '''
+    Initialize pygame and create the fullscreen window.
+    '''
+    global screen, WIDTH, HEIGHT, TILE_SIZE, FONT_SIZE, font
+    pygame.init()
 
+    # Create screen in fullscreen mode
+    screen = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
+    pygame.display.set_caption('Scrabble')
 
-# Load font
-font = pygame.font.Font(None, FONT_SIZE)
+    # Get screen dimensions
+    WIDTH, HEIGHT = screen.get_size()
+    TILE_SIZE = HEIGHT // 15
+    FONT_SIZE = TILE_SIZE - 10
 
-def draw_text(text, font, color, surface, x, y):
-    '''
-    Draw text centered at (x, y).
-    '''
-    textobj = font.render(text, True, color)
-    textrect = textobj.get_rect(center=(x, y))
-    surface.blit(textobj, textrect)
-    return textrect
+    # Load font
+    font = pygame.font.Font(None, FONT_SIZE)
 
 def draw_title(title):
     '''
@@ -60,45 +63,65 @@ def draw_buttons(buttons, max_button_width):
         draw_text(button, font, WHITE, screen, x + max_button_width // 2, y + BUTTON_HEIGHT // 2)
 
 def main_menu():
-    clock = pygame.time.Clock()
+    if screen is None:
+        init_display()
+
+    # Start loading the dictionary while the menu is up
+    dictionary = preload_dictionary('word_list.lex')
+    dictionary_loaded = False
 
     buttons = ["NEW GAME", "LOAD GAME", "RULES", "QUIT"]
     button_widths = [font.size(button)[0] + 40 for button in buttons]
     max_button_width = max(button_widths)
 
-    while True:
+    def handle_event(event):
+        if event.type == pygame.QUIT:
+            pygame.quit()
+            sys.exit()
+        if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+            mouse_x, mouse_y = event.pos
+            for i, button in enumerate(buttons):
+                x = (WIDTH - max_button_width) // 2
+                y = HEIGHT // 2 + i * (BUTTON_HEIGHT + BUTTON_MARGIN)
+                if x <= mouse_x <= x + max_button_width and y <= mouse_y <= y + BUTTON_HEIGHT:
+                    if button == "NEW GAME":
+                        teams_screen(screen, WIDTH, HEIGHT, font)
+                    elif button == "LOAD GAME":
+                        load_game(screen, WIDTH, HEIGHT, font)
+                    elif button == "RULES":
+                        rules_screen(screen, WIDTH, HEIGHT, font)
+                    elif button == "QUIT":
+                        pygame.quit()
+                        sys.exit()
+                    # Back from another screen
+                    return True
+        return False
+
+    def render():
         screen.fill(BLACK)  # Fill the screen with black
 
-        # Handle events
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
-            if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-                mouse_x, mouse_y = event.pos
-                for i, button in enumerate(buttons):
-                    x = (WIDTH - max_button_width) // 2
-                    y = HEIGHT // 2 + i * (BUTTON_HEIGHT + BUTTON_MARGIN)
-                    if x <= mouse_x <= x + max_button_width and y <= mouse_y <= y + BUTTON_HEIGHT:
-                        if button == "NEW GAME":
-                            teams_screen(screen, WIDTH, HEIGHT, font)
-                        elif button == "LOAD GAME":
-                            load_game(screen, WIDTH, HEIGHT, font)
-                        elif button == "RULES":
-                            rules_screen(screen, WIDTH, HEIGHT, font)
-                        elif button == "QUIT":
-                            pygame.quit()
-                            sys.exit()
-
         # Draw title
         draw_title('SCRABBLE')
 
         # Draw buttons
         draw_buttons(buttons, max_button_width)
 
+        # Draw loading indicator
+        if not dictionary.is_loaded():
+            draw_text('Loading dictionary...', font, WHITE, screen, WIDTH // 2, HEIGHT - BUTTON_HEIGHT)
+
         # Update the display
         pygame.display.flip()
-        clock.tick(60)
+
+    def poll():
+        # Redraw once to take the loading indicator away
+        nonlocal dictionary_loaded
+        if not dictionary_loaded and dictionary.is_loaded():
+            dictionary_loaded = True
+            return True
+        return False
+
+    screen_loop(handle_event, render, poll)
 
 if __name__ == '__main__':
     main_menu()
@@ -0,0 +1,36 @@
+import mmap
+import os
+
+class MappedFile:
+    '''
+    Read-only file queried in place through a memory map. Subclasses
+    check the header in read_header.
+    '''
+    def __init__(self, file_path):
+        self.file_path = file_path
+        with open(file_path, 'rb') as file:
+            self.data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.read_header()
+
+    def read_header(self):
+        pass
+
+    def __getstate__(self):
+        # The map itself can't be pickled, child processes reopen the file
+        return {'file_path': self.file_path}
+
+    def __setstate__(self, state):
+        self.__init__(state['file_path'])
+
+    def close(self):
+        self.data.close()
+
+def write_file(file_path, write):
+    '''
+    Calls write with a file object, writing to a temporary file first so
+    readers never see a partial file.
+    '''
+    tmp_path = file_path + '.tmp'
+    with open(tmp_path, 'wb') as file:
+        write(file)
+    os.replace(tmp_path, file_path)
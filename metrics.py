@@ -0,0 +1,139 @@
+import json
+import os
+import time
+import tracemalloc
+
+# Upper bounds of the frame time histogram buckets, in milliseconds
+FRAME_BUCKETS = [1, 2, 4, 8, 16, 33, 66, 133, 266, float('inf')]
+
+class Timer:
+    '''
+    Times the phases of one call, each lap being the time since the last.
+    '''
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+        self.start = self.last = time.perf_counter()
+
+    def lap(self, phase):
+        now = time.perf_counter()
+        self.metrics.record(f'{self.name}.{phase}', now - self.last)
+        self.last = now
+
+    def stop(self, phase):
+        self.lap(phase)
+        self.metrics.record(self.name, self.last - self.start)
+
+class Metrics:
+    '''
+    Timings of end_turn phases and game screen frames, and peak memory
+    through tracemalloc. Written to dump_path every dump_every seconds.
+    '''
+    def __init__(self, dump_path='scrabble_metrics.json', dump_every=30, trace_memory=True):
+        self.dump_path = dump_path
+        self.dump_every = dump_every
+        self.last_dump = time.monotonic()
+        # Timing name -> {'count', 'total', 'max', 'last'} in seconds
+        self.timings = {}
+        self.frames = [0] * len(FRAME_BUCKETS)
+        self.last_frame = 0
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def timer(self, name):
+        return Timer(self, name)
+
+    def record(self, name, seconds):
+        timing = self.timings.get(name)
+        if timing is None:
+            timing = self.timings[name] = {'count': 0, 'total': 0.0, 'max': 0.0, 'last': 0.0}
+        timing['count'] += 1
+        timing['total'] += seconds
+        timing['max'] = max(timing['max'], seconds)
+        timing['last'] = seconds
+
+    def frame(self, seconds):
+        ms = seconds * 1000
+        self.last_frame = ms
+        for i, bound in enumerate(FRAME_BUCKETS):
+            if ms <= bound:
+                self.frames[i] += 1
+                break
+
+    def frame_percentile(self, fraction):
+        '''
+        Upper bound of the bucket holding the given fraction of frames.
+        '''
+        wanted = fraction * sum(self.frames)
+        seen = 0
+        for bound, count in zip(FRAME_BUCKETS, self.frames):
+            seen += count
+            if count and seen >= wanted:
+                return bound
+        return 0
+
+    def memory(self):
+        '''
+        Current and peak traced memory in bytes, zeros when not tracing.
+        '''
+        if not tracemalloc.is_tracing():
+            return 0, 0
+        return tracemalloc.get_traced_memory()
+
+    def snapshot(self):
+        current, peak = self.memory()
+        timings = {}
+        for name, timing in sorted(self.timings.items()):
+            timings[name] = {
+                'count': timing['count'],
+                'mean_ms': timing['total'] / timing['count'] * 1000,
+                'max_ms': timing['max'] * 1000,
+                'last_ms': timing['last'] * 1000,
+            }
+        return {
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'timings': timings,
+            'frames': {
+                'buckets_ms': [str(bound) for bound in FRAME_BUCKETS],
+                'counts': list(self.frames),
+                'p50_ms': self.frame_percentile(0.5),
+                'p95_ms': self.frame_percentile(0.95),
+            },
+            'memory': {'current_bytes': current, 'peak_bytes': peak},
+        }
+
+    def overlay_lines(self):
+        '''
+        Short lines for the in-game overlay.
+        '''
+        turn = self.timings.get('end_turn')
+        _, peak = self.memory()
+        return [
+            f'turn {turn["last"] * 1000:.1f} ms' if turn else 'turn -',
+            f'frame {self.last_frame:.1f} ms',
+            f'p95 <{self.frame_percentile(0.95)} ms',
+            f'peak {peak / 1e6:.1f} MB',
+        ]
+
+    def dump(self):
+        tmp_path = self.dump_path + '.tmp'
+        with open(tmp_path, 'w') as file:
+            json.dump(self.snapshot(), file, indent=4)
+        os.replace(tmp_path, self.dump_path)
+        self.last_dump = time.monotonic()
+
+    def maybe_dump(self):
+        if time.monotonic() - self.last_dump >= self.dump_every:
+            self.dump()
+
+# Metrics of this process, None unless turned on with SCRABBLE_METRICS=1
+active = Metrics() if os.environ.get('SCRABBLE_METRICS') == '1' else None
+
+def enable(**options):
+    '''
+    Turn metrics on for games started from now on.
+    '''
+    global active
+    if active is None:
+        active = Metrics(**options)
+    return active
@@ -0,0 +1,237 @@
+import argparse
+import math
+import os
+import random
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from back import CompactBoard, BONUS_INDEX
+from leaves import LeaveTable
+from lexicon import KnownWords
+from movegen import distinct_moves, shared_generator
+from tile_tracker import TileTracker
+
+# 95% confidence intervals
+Z_95 = 1.96
+
+# Move generator, dictionary lookups, leave table and boards of the
+# current worker process, set by init_worker
+GENERATOR = None
+WORDS = None
+LEAVES = None
+BOARDS = {}
+
+def init_worker(dictionary_path, leaves_path=None):
+    '''
+    Sets the globals above once per worker.
+    '''
+    global GENERATOR, WORDS, LEAVES
+    GENERATOR = shared_generator(dictionary_path)
+    WORDS = KnownWords(GENERATOR.dictionary)
+    LEAVES = LeaveTable(leaves_path) if leaves_path else None
+
+def board_arrays(board):
+    '''
+    A board as (size, letters, blanks, locked, bonuses) bytes, small enough
+    to send with every task.
+    '''
+    area = board.size * board.size
+    letters, blanks, locked, bonuses = bytearray(area), bytearray(area), bytearray(area), bytearray(area)
+    for row in range(board.size):
+        for col in range(board.size):
+            cell = board.get_cell(row, col)
+            index = row * board.size + col
+            if board.has_tile(row, col):
+                letters[index] = ord(cell.letter)
+                blanks[index] = cell.blank
+                locked[index] = 1
+            bonuses[index] = BONUS_INDEX[cell.bonus]
+    return (board.size, bytes(letters), bytes(blanks), bytes(locked), bytes(bonuses))
+
+def worker_board(arrays):
+    # Tasks of one evaluation share the board, cross-checks included
+    board = BOARDS.get(arrays)
+    if board is None:
+        BOARDS.clear()
+        board = BOARDS[arrays] = CompactBoard.from_arrays(*arrays)
+        board.compute_cross_checks(WORDS)
+    return board
+
+def place(board, tiles, words):
+    for row, col, letter, blank in tiles:
+        board.set_cell(row, col, letter, blank, True)
+    board.update_cross_checks(words, [(row, col) for row, col, _, _ in tiles])
+
+def take(rack, tiles):
+    rack = list(rack)
+    for _, _, letter, blank in tiles:
+        rack.remove('_' if blank else letter)
+    return rack
+
+def rollout(generator, words, board, unseen, leave, move, seed, plies, leaves=None):
+    '''
+    Plays move, then plies more turns from a random deal of the unseen
+    tiles, each side taking its top scoring play. Returns the spread
+    for the player of move, its score included, plus the value of what
+    they kept after their last play when a leave table is given.
+    '''
+    rng = random.Random(seed)
+    bag = list(unseen)
+    rng.shuffle(bag)
+    board = board.copy()
+    tiles, score = move
+    place(board, tiles, words)
+
+    # The opponent already holds their rack, the player draws after it
+    racks = [None, bag[:7]]
+    del bag[:7]
+    racks[0] = leave + bag[:len(tiles)]
+    del bag[:len(tiles)]
+
+    spread = score
+    kept = ''.join(leave)
+    for ply in range(plies):
+        player = 1 - ply % 2
+        moves = generator.generate(board, ''.join(racks[player]))
+        if not moves:
+            continue
+        best = moves[0]
+        place(board, best.tiles, words)
+        spread += best.score if player == 0 else -best.score
+        racks[player] = take(racks[player], best.tiles)
+        if player == 0:
+            kept = ''.join(racks[0])
+        drawn = bag[:7 - len(racks[player])]
+        del bag[:len(drawn)]
+        racks[player] += drawn
+        if not racks[player]:
+            break
+    if leaves is not None:
+        spread += leaves.value(kept)
+    return spread
+
+def run_rollouts(arrays, unseen, leave, move, seeds, plies):
+    board = worker_board(arrays)
+    return [rollout(GENERATOR, WORDS, board, unseen, leave, move, seed, plies, LEAVES) for seed in seeds]
+
+class Candidate:
+    '''
+    A move being simulated and the spreads of its rollouts so far.
+    '''
+    def __init__(self, move, leave):
+        self.move = move
+        self.leave = leave
+        self.spreads = []
+        self.pruned = False
+
+    def mean(self):
+        return statistics.fmean(self.spreads) if self.spreads else float(self.move.score)
+
+    def interval(self):
+        '''
+        95% confidence interval of the mean spread.
+        '''
+        mean = self.mean()
+        if len(self.spreads) < 2:
+            return -math.inf, math.inf
+        half = Z_95 * statistics.stdev(self.spreads) / math.sqrt(len(self.spreads))
+        return mean - half, mean + half
+
+class Simulator:
+    '''
+    Ranks the top scoring plays of a rack by playing each of them out
+    against random deals of the unseen tiles on a process pool.
+
+    Rollout i of every candidate uses the same deal (seeded from seed and
+    i), so candidates are compared on equal terms and the results don't
+    depend on the number of workers. Rollouts run in rounds, after each one
+    the candidates whose confidence interval lies wholly below the
+    leader's are dropped. leaves_path is a leave table (see leaves.py)
+    to value what the player keeps at the end of each rollout.
+    '''
+    def __init__(self, dictionary_path='word_list.lex', workers=None, leaves_path=None):
+        self.workers = workers or os.cpu_count()
+        self.generator = shared_generator(dictionary_path)
+        self.pool = ProcessPoolExecutor(self.workers, initializer=init_worker, initargs=(dictionary_path, leaves_path))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.pool.shutdown()
+
+    def evaluate(self, board, rack, candidates=10, plies=2, iterations=1000, round_size=100, seed=0, time_limit=None):
+        '''
+        Simulate the best candidates plays of rack ('_' for blanks), each
+        followed by plies turns, up to iterations rollouts each. Returns
+        the Candidates, best mean spread first.
+        '''
+        start = time.perf_counter()
+        rack = rack.upper()
+        # The generator builds a cross-check cache on the board it is given,
+        # keep it off the caller's board
+        moves = distinct_moves(self.generator.generate(CompactBoard.from_board(board), rack), candidates)
+        unseen = ''.join(tile * count for tile, count in TileTracker(board, rack).unseen().items())
+        arrays = board_arrays(board)
+        everyone = [Candidate(move, take(rack, move.tiles)) for move in moves]
+        live = list(everyone)
+
+        done = 0
+        while live and done < iterations and (len(live) > 1 or not done):
+            seeds = [seed * 1000003 + i for i in range(done, min(done + round_size, iterations))]
+            # About two tasks per worker per round
+            pieces = max(1, math.ceil(2 * self.workers / len(live)))
+            size = math.ceil(len(seeds) / pieces)
+            tasks = []
+            for candidate in live:
+                move = (candidate.move.tiles, candidate.move.score)
+                for i in range(0, len(seeds), size):
+                    future = self.pool.submit(run_rollouts, arrays, unseen, candidate.leave, move, seeds[i:i + size], plies)
+                    tasks.append((candidate, future))
+            for candidate, future in tasks:
+                candidate.spreads.extend(future.result())
+            done += len(seeds)
+
+            leader = max(live, key=Candidate.mean)
+            low = leader.interval()[0]
+            for candidate in live:
+                if candidate is not leader and candidate.interval()[1] < low:
+                    candidate.pruned = True
+            live = [candidate for candidate in live if not candidate.pruned]
+            if time_limit is not None and time.perf_counter() - start > time_limit:
+                break
+
+        everyone.sort(key=Candidate.mean, reverse=True)
+        return everyone
+
+if __name__ == '__main__':
+    from hints import move_label
+    from load_game import read_saved_game
+
+    parser = argparse.ArgumentParser(description='Rank the plays of a rack in the saved game by simulation.')
+    parser.add_argument('rack', help='rack to play from, _ for blanks')
+    parser.add_argument('--candidates', type=int, default=10)
+    parser.add_argument('--plies', type=int, default=2, help='turns played after each candidate')
+    parser.add_argument('--iterations', type=int, default=1000, help='most rollouts per candidate')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--time', type=float, default=None, help='stop after a round once this many seconds passed')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--dictionary', default='word_list.lex')
+    parser.add_argument('--leaves', default=None, help='leave table to value the tiles kept, e.g. leaves.bin')
+    args = parser.parse_args()
+
+    data = read_saved_game()
+    if data is None:
+        sys.exit('no saved game')
+    start = time.perf_counter()
+    with Simulator(args.dictionary, args.workers, args.leaves) as simulator:
+        results = simulator.evaluate(data['board'], args.rack, args.candidates, args.plies, args.iterations, seed=args.seed, time_limit=args.time)
+    for candidate in results:
+        low, high = candidate.interval()
+        status = ' (dropped)' if candidate.pruned else ''
+        print(f'{move_label(data["board"], candidate.move):24} {candidate.mean():+7.1f} +/- {(high - low) / 2:.1f}, {len(candidate.spreads)} rollouts{status}')
+    print(f'{sum(len(candidate.spreads) for candidate in results)} rollouts in {time.perf_counter() - start:.1f}s')
@@ -0,0 +1,493 @@
+import array
+import os
+import struct
+import sys
+import threading
+from back import ALL_LETTERS, BONUS_MULTIPLIERS, tile_value
+from lexicon import Lexicon
+from mapped_file import MappedFile, write_file
+
+# GADDAG entries are rev(prefix) + SEPARATOR + suffix for every split of
+# every word, plus the fully reversed word. Starting from an anchor the
+# search walks left through the reversed prefix, crosses the separator and
+# then walks right through the suffix.
+SEPARATOR = '+'
+
+# File layout: a fixed-size header, then for every node the index of its
+# first arc (plus one more entry where the last node's arcs end), then the
+# arcs as letter << 24 | child node, all little-endian uint32, then one
+# byte per node that is 1 when the node ends an entry. Nodes with the same
+# arcs and ending are stored once, so the entries share their suffixes too.
+MAGIC = b'GAD1'
+HEADER = struct.Struct('<4sIII')
+HEADER_SIZE = HEADER.size
+MAX_NODES = 1 << 24
+
+# Held while a GADDAG file is opened or built, so threads loading the same
+# dictionary don't build it twice
+gaddag_lock = threading.Lock()
+
+# Move generators opened in this process, by dictionary path
+generators = {}
+
+# Search steps between calls to a generator's stop function
+STOP_INTERVAL = 1000
+
+def gaddag_entries(words):
+    for word in words:
+        for i in range(1, len(word)):
+            yield word[:i][::-1] + SEPARATOR + word[i:]
+        yield word[::-1]
+
+def minimal_graph(entries):
+    '''
+    Builds the smallest graph accepting the sorted entries (Daciuk's
+    incremental construction). Returns ends, arcs and the root: ends[n]
+    tells if node n ends an entry and arcs[n] lists its (letter, child).
+    '''
+    register = {}
+    ends = []
+    arcs = []
+    # Nodes on the path of the last entry, not yet merged with equal ones
+    path = [[False, []]]
+    previous = ''
+
+    def freeze(depth):
+        while len(path) > depth + 1:
+            node_end, node_arcs = path.pop()
+            key = (node_end, tuple(node_arcs))
+            node = register.get(key)
+            if node is None:
+                node = register[key] = len(ends)
+                ends.append(node_end)
+                arcs.append(node_arcs)
+            parent_arcs = path[-1][1]
+            parent_arcs[-1] = (parent_arcs[-1][0], node)
+
+    for entry in entries:
+        common = 0
+        limit = min(len(entry), len(previous))
+        while common < limit and entry[common] == previous[common]:
+            common += 1
+        freeze(common)
+        for letter in entry[common:]:
+            path[-1][1].append((letter, None))
+            path.append([False, []])
+        path[-1][0] = True
+        previous = entry
+    freeze(0)
+
+    root_end, root_arcs = path[0]
+    ends.append(root_end)
+    arcs.append(root_arcs)
+    return ends, arcs, len(ends) - 1
+
+def build_gaddag(words, file_path):
+    '''
+    Compiles a GADDAG for words into a file.
+    '''
+    ends, arcs, root = minimal_graph(sorted(set(gaddag_entries(words))))
+    if len(ends) > MAX_NODES:
+        raise ValueError(f'{len(ends)} nodes do not fit in an arc')
+    first = array.array('I', [0])
+    table = array.array('I')
+    for node_arcs in arcs:
+        table.extend(ord(letter) << 24 | child for letter, child in node_arcs)
+        first.append(len(table))
+    if sys.byteorder == 'big':
+        first.byteswap()
+        table.byteswap()
+
+    def write(file):
+        file.write(HEADER.pack(MAGIC, len(ends), len(table), root))
+        first.tofile(file)
+        table.tofile(file)
+        file.write(bytes(ends))
+
+    write_file(file_path, write)
+
+class Gaddag(MappedFile):
+    '''
+    GADDAG read in place through a memory map. Nodes are numbers and the
+    arcs of a node are one slice of the arc table.
+    '''
+    def read_header(self):
+        magic, self.count, arc_count, self.root_node = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC:
+            raise ValueError(f'{self.file_path} is not a GADDAG')
+        arcs_start = HEADER_SIZE + 4 * (self.count + 1)
+        ends_start = arcs_start + 4 * arc_count
+        view = memoryview(self.data)
+        if sys.byteorder == 'little':
+            self.first = view[HEADER_SIZE:arcs_start].cast('I')
+            self.arcs = view[arcs_start:ends_start].cast('I')
+        else:
+            self.first = array.array('I', view[HEADER_SIZE:arcs_start])
+            self.arcs = array.array('I', view[arcs_start:ends_start])
+            self.first.byteswap()
+            self.arcs.byteswap()
+        self.ends = view[ends_start:ends_start + self.count]
+        self.view = view
+
+    def close(self):
+        # Views into the map have to go before the map itself
+        for view in (self.first, self.arcs, self.ends, self.view):
+            if isinstance(view, memoryview):
+                view.release()
+        super().close()
+
+    def root(self):
+        return self.root_node
+
+    def is_word(self, node):
+        '''
+        Checks if the path to a node spells a whole entry.
+        '''
+        return bool(self.ends[node])
+
+    def edges(self, node):
+        '''
+        Letters that extend a node, mapped to the child nodes, in sorted order.
+        '''
+        return {chr(arc >> 24): arc & 0xFFFFFF for arc in self.arcs[self.first[node]:self.first[node + 1]]}
+
+    def child(self, node, letter):
+        '''
+        Node for the path extended by letter, or None.
+        '''
+        return self.edges(node).get(letter)
+
+def load_gaddag(dictionary, file_path=None, build=True):
+    '''
+    Opens the GADDAG shipped with a dictionary. If it is missing (or left by
+    an older version in another format) it is built, which takes a while,
+    or with build False None is returned instead.
+    '''
+    if file_path is None:
+        file_path = os.path.splitext(dictionary.file_path)[0] + '.gaddag'
+    with gaddag_lock:
+        try:
+            return Gaddag(file_path)
+        except (OSError, ValueError):
+            if not build:
+                return None
+            build_gaddag(dictionary, file_path)
+            return Gaddag(file_path)
+
+def shared_generator(dictionary_path):
+    '''
+    Move generator for a compiled lexicon, opened once per process. Called
+    before starting a process pool it builds a missing GADDAG once instead
+    of in every worker at the same time. As a pool initializer it opens
+    the lexicon and GADDAG once per worker, the pages are shared.
+    '''
+    generator = generators.get(dictionary_path)
+    if generator is None:
+        generator = generators[dictionary_path] = MoveGenerator(Lexicon(dictionary_path))
+    return generator
+
+class Move:
+    '''
+    A legal play: the tiles to place, the main word and the score.
+    '''
+    def __init__(self, tiles, word, score, horizontal):
+        # tiles is a list of (row, col, letter, blank)
+        self.tiles = tiles
+        self.word = word
+        self.score = score
+        self.horizontal = horizontal
+
+    def __repr__(self):
+        row, col = self.tiles[0][:2]
+        direction = 'across' if self.horizontal else 'down'
+        return f'Move({self.word} at ({row}, {col}) {direction}, {self.score} pts)'
+
+def distinct_moves(moves, limit=None):
+    '''
+    The first moves that look different, the same word in the same place
+    counts once.
+    '''
+    distinct = []
+    seen = set()
+    for move in moves:
+        key = (move.word, move.tiles[0][:2], move.horizontal)
+        if key not in seen:
+            seen.add(key)
+            distinct.append(move)
+            if len(distinct) == limit:
+                break
+    return distinct
+
+class Line:
+    '''
+    One row (across) or column (down) of the board, with what the search
+    needs to know about each of its squares.
+    '''
+    def __init__(self, board, index, horizontal):
+        self.index = index
+        self.horizontal = horizontal
+        self.letters = []
+        self.blanks = []
+        self.bonuses = []
+        # Letters allowed by the perpendicular word and the points of the
+        # perpendicular tiles, both None when there are none
+        self.cross_checks = []
+        self.cross_sums = []
+        self.anchors = []
+        # Letters that can go on each square and its (letter, word) multipliers
+        self.allowed = []
+        self.multipliers = []
+        self.positions = []
+        for i in range(board.size):
+            row, col = self.position(i)
+            cell = board.get_cell(row, col)
+            key = row * board.size + col
+            self.letters.append(cell.letter if board.has_tile(row, col) else None)
+            self.blanks.append(cell.blank)
+            self.bonuses.append(cell.bonus)
+            self.cross_checks.append(board.cross_checks[horizontal][key])
+            self.cross_sums.append(board.cross_sums[horizontal][key])
+            self.anchors.append(board.anchors[key])
+            self.allowed.append(ALL_LETTERS if self.cross_checks[-1] is None else self.cross_checks[-1])
+            self.multipliers.append(BONUS_MULTIPLIERS[cell.bonus])
+            self.positions.append((row, col))
+
+    def position(self, i):
+        return (self.index, i) if self.horizontal else (i, self.index)
+
+class SearchStopped(Exception):
+    '''
+    Raised inside the search when stop() asks it to end.
+    '''
+
+class MoveGenerator:
+    '''
+    Finds every legal play for a rack with an anchor/cross-check GADDAG search.
+    '''
+    def __init__(self, dictionary, gaddag=None):
+        self.dictionary = dictionary
+        self.gaddag = gaddag if gaddag is not None else load_gaddag(dictionary)
+        # Memoized GADDAG arcs, node -> ({letter: child node}, ends a word)
+        self.arcs = {}
+
+    def arc(self, node):
+        '''
+        Letters leaving a GADDAG node mapped to the nodes they lead to, and
+        whether the node ends a word.
+        '''
+        arc = self.arcs.get(node)
+        if arc is None:
+            if len(self.arcs) > 200000:
+                self.arcs.clear()
+            arc = (self.gaddag.edges(node), self.gaddag.is_word(node))
+            self.arcs[node] = arc
+        return arc
+
+    def generate(self, board, rack, stop=None):
+        '''
+        Gets every legal move for rack ('_' for blanks), best score first.
+        Each word comes once, using as few blanks as it can, on the squares
+        where they cost the fewest points.
+        stop is checked before every anchor and every STOP_INTERVAL steps of
+        the search, once it returns True the moves found so far are returned.
+        '''
+        counts = {}
+        for letter in rack.upper():
+            counts[letter] = counts.get(letter, 0) + 1
+        self.rack = dict(counts)
+        self.blanks = counts.get('_', 0)
+        self.stop = stop
+        # Without a stop function the countdown goes below zero and stays there
+        self.countdown = STOP_INTERVAL if stop is not None else 0
+
+        board.ensure_cross_checks(self.dictionary)
+        # Most promising anchors first, so a search stopped early has looked
+        # all over the board instead of only at its top rows
+        reach = min(len(rack), 7)
+        anchors = []
+        for horizontal in (True, False):
+            for index in range(board.size):
+                line = Line(board, index, horizontal)
+                anchors.extend((line, anchor) for anchor in self.find_anchors(board, line))
+        anchors.sort(key=lambda item: self.promise(item[0], item[1], reach), reverse=True)
+
+        moves = []
+        try:
+            for line, anchor in anchors:
+                if stop is not None and stop():
+                    raise SearchStopped
+                # With tiles right of the anchor, start from the last of them,
+                # so they narrow the search before any tile from the rack is
+                # placed
+                start = anchor
+                while start < board.size - 1 and line.letters[start + 1]:
+                    start += 1
+                self.anchor = anchor
+                self.start = start
+                self.line = line
+                self.gen(start, self.arc(self.gaddag.root()), counts, [], '', 0, 1, 0, moves)
+        except SearchStopped:
+            pass
+
+        moves.sort(key=lambda move: move.score, reverse=True)
+        return moves
+
+    def promise(self, line, anchor, reach):
+        '''
+        Cheap guess at how well plays through an anchor can score: the best
+        word and then letter multiplier on the empty squares the rack can
+        reach from it.
+        '''
+        word_best = letter_best = 1
+        for i in range(max(anchor - reach + 1, 0), min(anchor + reach, len(line.letters))):
+            if not line.letters[i]:
+                letter_mult, word_mult = line.multipliers[i]
+                word_best = max(word_best, word_mult)
+                letter_best = max(letter_best, letter_mult)
+        return word_best, letter_best
+
+    def find_anchors(self, board, line):
+        '''
+        Empty squares next to a tile, or the center square on an empty board.
+        '''
+        anchors = [i for i, anchor in enumerate(line.anchors) if anchor]
+        if not anchors and line.index == board.size // 2 and not self.board_has_tiles(board):
+            anchors.append(board.size // 2)
+        return anchors
+
+    def board_has_tiles(self, board):
+        for row in range(board.size):
+            for col in range(board.size):
+                if board.has_tile(row, col):
+                    return True
+        return False
+
+    def gen(self, i, arc, counts, tiles, word, main_sum, main_mult, cross_total, moves):
+        # arc is the (edges, ends a word) of the GADDAG node reached so far
+        self.countdown -= 1
+        if not self.countdown:
+            self.countdown = STOP_INTERVAL
+            if self.stop():
+                raise SearchStopped
+        line = self.line
+        letter = line.letters[i]
+        letter_mult, word_mult = line.multipliers[i]
+        edges = arc[0]
+        if letter:
+            # Existing tile, the word must run through it
+            node = edges.get(letter)
+            if node is not None:
+                self.go_on(
+                    i, letter, node, counts, tiles, word,
+                    main_sum + tile_value(letter, line.blanks[i]) * letter_mult,
+                    main_mult * word_mult, cross_total, moves,
+                )
+            return
+
+        # Empty square, a tile from the rack goes here
+        allowed = line.allowed[i]
+        cross_sum = line.cross_sums[i]
+        if counts.get('_'):
+            letters = edges
+        else:
+            # Without a blank only the letters on the rack can be placed
+            letters = [placed for placed, count in counts.items() if count and placed in edges]
+        for placed in letters:
+            if placed not in allowed:
+                continue
+            # One branch per letter: a real tile while there are any left,
+            # otherwise a blank. record() picks the squares for the blanks.
+            tile = placed if counts.get(placed) else '_'
+            blank = tile == '_'
+            value = tile_value(placed, blank) * letter_mult
+            cross = cross_total
+            if cross_sum is not None:
+                cross += (cross_sum + value) * word_mult
+            counts[tile] -= 1
+            tiles.append((i, placed, blank))
+            self.go_on(
+                i, placed, edges[placed], counts, tiles, word,
+                main_sum + value, main_mult * word_mult, cross, moves,
+            )
+            tiles.pop()
+            counts[tile] += 1
+
+    def go_on(self, i, letter, node, counts, tiles, word, main_sum, main_mult, cross_total, moves):
+        line = self.line
+        anchor = self.anchor
+        start = self.start
+        size = len(line.letters)
+        arc = self.arcs.get(node) or self.arc(node)
+        if i <= start:
+            word = letter + word
+            left_empty = i == 0 or not line.letters[i - 1]
+            # Only once the anchor is covered, and start has an empty square
+            # or the edge of the board right of it
+            if i <= anchor:
+                if arc[1] and left_empty:
+                    self.record(word, tiles, main_sum, main_mult, cross_total, moves)
+
+                # Switch direction and extend right of the start
+                if left_empty and start < size - 1:
+                    separator = arc[0].get(SEPARATOR)
+                    if separator is not None:
+                        self.gen(start + 1, self.arc(separator), counts, tiles, word, main_sum, main_mult, cross_total, moves)
+
+            # Keep going left, but past the anchor never onto an earlier
+            # anchor, moves covering it are generated from that anchor instead
+            if i > 0 and (i > anchor or not line.anchors[i - 1]):
+                self.gen(i - 1, arc, counts, tiles, word, main_sum, main_mult, cross_total, moves)
+        else:
+            word = word + letter
+            right_empty = i == size - 1 or not line.letters[i + 1]
+            if arc[1] and right_empty:
+                self.record(word, tiles, main_sum, main_mult, cross_total, moves)
+            if i < size - 1 and arc[0]:
+                self.gen(i + 1, arc, counts, tiles, word, main_sum, main_mult, cross_total, moves)
+
+    def record(self, word, tiles, main_sum, main_mult, cross_total, moves):
+        line = self.line
+        # A lone tile forming words both ways is found across, skip it down
+        if len(tiles) == 1 and not line.horizontal:
+            if line.cross_checks[tiles[0][0]] is not None:
+                return
+
+        score = main_sum * main_mult + cross_total
+        if len(tiles) == 7:
+            score += 50
+        tiles = sorted(tiles)
+        positions = line.positions
+        # The search used a blank only once the rack ran out of a letter, but
+        # when the word has that letter more than once any of its squares
+        # could hold the blank. Keep one move per word, with the blanks on the
+        # squares where they cost the fewest points.
+        mixed = self.blanks and {letter for _, letter, blank in tiles if blank and self.rack.get(letter)}
+        if mixed:
+            multipliers = line.multipliers
+            cross_sums = line.cross_sums
+            for letter in mixed:
+                squares = []
+                forced = 0
+                for k, (i, placed, blank) in enumerate(tiles):
+                    if placed != letter:
+                        continue
+                    # Points the tile adds as a real tile, to the main word
+                    # and to the word across it
+                    letter_mult, word_mult = multipliers[i]
+                    worth = tile_value(letter, False) * letter_mult * (main_mult if cross_sums[i] is None else main_mult + word_mult)
+                    squares.append((worth, k))
+                    if blank:
+                        score += worth
+                        forced += 1
+                squares.sort()
+                for number, (worth, k) in enumerate(squares):
+                    i = tiles[k][0]
+                    tiles[k] = (i, letter, number < forced)
+                    if number < forced:
+                        score -= worth
+        placed = [positions[i] + (letter, blank) for i, letter, blank in tiles]
+        moves.append(Move(placed, word, score, line.horizontal))
+
+if __name__ == '__main__':
+    # Usage: python movegen.py word_list.lex word_list.gaddag
+    build_gaddag(Lexicon(sys.argv[1]), sys.argv[2])
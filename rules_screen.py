@@ -1,5 +1,7 @@
 import pygame
 import sys
+from screen_loop import LEAVE, screen_loop
+from text_cache import draw_text
 
 # Constants
 BLUE = (20, 100, 150)
@@ -120,21 +122,12 @@ RULES_TEXT = [
     ]
 ]
 
-def draw_text(text, font, color, surface, x, y, align='topleft'):
-    textobj = font.render(text, True, color)
-    if align == 'topleft':
-        textrect = textobj.get_rect(topleft=(x, y))
-    if align == 'center':
-        textrect = textobj.get_rect(center=(x, y))
-    surface.blit(textobj, textrect)
-    return textrect
-
 def draw_rules(current_page, font, surface):
     '''
     Draw the rules for the current page.
     '''
     for i, line in enumerate(RULES_TEXT[current_page]):
-        draw_text(line, font, WHITE, surface, 50, 100 + i * 50)
+        draw_text(line, font, WHITE, surface, 50, 100 + i * 50, align='topleft')
 
 def draw_arrows(surface, arrow_height, width):
     '''
@@ -149,54 +142,58 @@ def draw_arrows(surface, arrow_height, width):
     pygame.draw.polygon(surface, BLUE, right_arrow)
 
 def rules_screen(screen, WIDTH, HEIGHT, font):
-    clock = pygame.time.Clock()
-
     total_pages = len(RULES_TEXT)
     current_page = 0
 
     # Return to main menu rectangle and text
     return_button_text = 'Return to Main Menu'
-    button_text_rect = draw_text(return_button_text, font, WHITE, screen, WIDTH // 2, HEIGHT - BUTTON_HEIGHT // 2 - 20)
+    button_text_rect = draw_text(return_button_text, font, WHITE, screen, WIDTH // 2, HEIGHT - BUTTON_HEIGHT // 2 - 20, align='topleft')
     return_button_width = button_text_rect.width + 40  # Add padding around the text
     return_button = pygame.Rect((WIDTH - return_button_width) // 2, HEIGHT - BUTTON_HEIGHT - 20, return_button_width, BUTTON_HEIGHT)
 
-    while True:
-        screen.fill(BLACK)  # Fill the screen with black
+    # Height of the page arrows
+    ARROW_HEIGHT = (3 * HEIGHT // 4)
 
-        # Handle events
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
-            if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-                mouse_x, mouse_y = event.pos
-                # Check if 'Return to Main Menu' button is clicked
-                if return_button.collidepoint(mouse_x, mouse_y):
-                    return  # Return to main menu
-                # Check if left arrow is clicked
-                if 50 <= mouse_x <= 100 and ARROW_HEIGHT - 25 <= mouse_y <= ARROW_HEIGHT + 25:
-                    if current_page > 0:
-                        current_page -= 1
-                # Check if right arrow is clicked
-                if WIDTH - 100 <= mouse_x <= WIDTH - 50 and ARROW_HEIGHT - 25 <= mouse_y <= ARROW_HEIGHT + 25:
-                    if current_page < total_pages - 1:
-                        current_page += 1
+    def handle_event(event):
+        nonlocal current_page
+        if event.type == pygame.QUIT:
+            pygame.quit()
+            sys.exit()
+        if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+            mouse_x, mouse_y = event.pos
+            # Check if 'Return to Main Menu' button is clicked
+            if return_button.collidepoint(mouse_x, mouse_y):
+                return LEAVE  # Return to main menu
+            # Check if left arrow is clicked
+            if 50 <= mouse_x <= 100 and ARROW_HEIGHT - 25 <= mouse_y <= ARROW_HEIGHT + 25:
+                if current_page > 0:
+                    current_page -= 1
+                    return True
+            # Check if right arrow is clicked
+            if WIDTH - 100 <= mouse_x <= WIDTH - 50 and ARROW_HEIGHT - 25 <= mouse_y <= ARROW_HEIGHT + 25:
+                if current_page < total_pages - 1:
+                    current_page += 1
+                    return True
+        return False
+
+    def render():
+        screen.fill(BLACK)  # Fill the screen with black
 
         # Draw current rules text
         draw_rules(current_page, font, screen)
 
         # Draw arrows
-        ARROW_HEIGHT = (3 * HEIGHT // 4)
         draw_arrows(screen, ARROW_HEIGHT, WIDTH)
         
         # Draw page number
         page_number = f'{current_page + 1}/{total_pages}'
-        draw_text(page_number, font, WHITE, screen, WIDTH // 2, ARROW_HEIGHT)
+        draw_text(page_number, font, WHITE, screen, WIDTH // 2, ARROW_HEIGHT, align='topleft')
 
         # Draw 'Return to Main Menu' button
         pygame.draw.rect(screen, BLUE, return_button)
-        draw_text(return_button_text, font, WHITE, screen, return_button.centerx, return_button.centery, align='center')
+        draw_text(return_button_text, font, WHITE, screen, return_button.centerx, return_button.centery)
 
         # Update the display
         pygame.display.flip()
-        clock.tick(60)
+
+    screen_loop(handle_event, render)
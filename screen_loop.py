@@ -0,0 +1,40 @@
+import pygame
+
+# Returned by an event handler to leave the screen
+LEAVE = object()
+
+# Events that mean the window has to be drawn again
+EXPOSE_EVENTS = {
+    getattr(pygame, name) for name in ('VIDEOEXPOSE', 'WINDOWEXPOSED', 'WINDOWRESTORED', 'WINDOWSHOWN')
+    if hasattr(pygame, name)
+}
+
+def screen_loop(handle_event, render, poll=None, timeout=250):
+    '''
+    Runs a screen without redrawing while idle.
+
+    Sleeps in pygame.event.wait until an event arrives (or timeout ms pass),
+    hands every queued event to handle_event, and only calls render when a
+    handler returned True or the window was exposed. A handler returns
+    LEAVE to leave the screen.
+    poll, if given, runs after every wake up and returns True when
+    something outside the event queue needs a redraw.
+    '''
+    needs_render = True
+    while True:
+        if needs_render:
+            render()
+            needs_render = False
+
+        events = [pygame.event.wait(timeout)] + pygame.event.get()
+        for event in events:
+            if event.type == pygame.NOEVENT:
+                continue
+            result = handle_event(event)
+            if result is LEAVE:
+                return
+            if result or event.type in EXPOSE_EVENTS:
+                needs_render = True
+
+        if poll and poll():
+            needs_render = True
@@ -0,0 +1,208 @@
+import argparse
+import asyncio
+import json
+import time
+from back import CompactBoard, Game
+from dictionary import read_dictionary
+
+# Protocol: one JSON object per line each way. Every request has an 'op'
+# and gets one response with 'ok' set, and 'error' when it is False.
+#   {"op": "new", "teams": 2}                      -> game
+#   {"op": "play", "game": 1, "tiles": [[row, col, letter, blank], ...],
+#    "player": 0}                                   -> valid, score, scores, current_player
+#   {"op": "pass", "game": 1}                       -> scores, current_player
+#   {"op": "undo" | "redo", "game": 1}              -> done, scores, current_player
+#   {"op": "state", "game": 1}                      -> board, scores, current_player, turn
+#   {"op": "close", "game": 1}
+#   {"op": "stats"}                                 -> games, moves, mean_move_us
+# "player" is optional, when given it has to be the current player.
+# An invalid word still ends the turn, like in the app. Tiles on taken
+# squares or outside the board are refused without ending it.
+DEFAULT_PORT = 8765
+MAX_TEAMS = 4
+
+class RequestError(Exception):
+    pass
+
+def is_number(value):
+    # bool is an int too, but true isn't 1 here
+    return isinstance(value, int) and not isinstance(value, bool)
+
+class GameServer:
+    '''
+    Hosts many games in one process, all checked against one dictionary.
+    '''
+    def __init__(self, dictionary):
+        self.dictionary = dictionary
+        self.games = {}
+        self.next_id = 1
+        self.moves = 0
+        self.move_seconds = 0
+
+    def game_id(self, request):
+        game_id = request.get('game')
+        if not is_number(game_id):
+            raise RequestError('game must be a game number')
+        return game_id
+
+    def game(self, request):
+        game = self.games.get(self.game_id(request))
+        if game is None:
+            raise RequestError('no such game')
+        player = request.get('player')
+        if player is not None and not is_number(player):
+            raise RequestError('player must be a number')
+        if player is not None and player != game.current_player:
+            raise RequestError('not this player\'s turn')
+        return game
+
+    def handle(self, request):
+        '''
+        Answers one request, as a JSON-ready dict.
+        '''
+        handler = getattr(self, 'op_' + str(request.get('op')), None)
+        if handler is None:
+            return {'ok': False, 'error': 'unknown op'}
+        try:
+            response = handler(request)
+        except RequestError as error:
+            return {'ok': False, 'error': str(error)}
+        except Exception as error:
+            # A bug in one request shouldn't drop the client's connection
+            return {'ok': False, 'error': f'internal error: {error!r}'}
+        response['ok'] = True
+        return response
+
+    def op_new(self, request):
+        teams = request.get('teams', 2)
+        if not is_number(teams) or not 1 <= teams <= MAX_TEAMS:
+            raise RequestError(f'teams must be 1 to {MAX_TEAMS}')
+        game = Game(teams, autosave=False)
+        game.board = CompactBoard()
+        game.dictionary = self.dictionary
+        game_id = self.next_id
+        self.next_id += 1
+        self.games[game_id] = game
+        return {'game': game_id}
+
+    def op_play(self, request):
+        game = self.game(request)
+        tiles = request.get('tiles')
+        board = game.board
+        if not isinstance(tiles, list) or not 1 <= len(tiles) <= 7:
+            raise RequestError('a play is 1 to 7 tiles')
+        squares = set()
+        for tile in tiles:
+            if not isinstance(tile, list) or len(tile) != 4:
+                raise RequestError('tiles are [row, col, letter, blank]')
+            row, col, letter, blank = tile
+            if not (is_number(row) and is_number(col) and 0 <= row < board.size and 0 <= col < board.size):
+                raise RequestError('tile outside the board')
+            if not (isinstance(letter, str) and len(letter) == 1 and 'A' <= letter <= 'Z'):
+                raise RequestError('letters are A to Z')
+            if (row, col) in squares or board.get_cell(row, col).letter:
+                raise RequestError('square already taken')
+            squares.add((row, col))
+
+        start = time.perf_counter()
+        player = game.current_player
+        before = game.scores[player]
+        for row, col, letter, blank in tiles:
+            game.place_tile(row, col, letter, bool(blank))
+        game.end_turn()
+        # Valid plays are the ones that got locked
+        row, col = tiles[0][:2]
+        valid = bool(board.get_cell(row, col).locked)
+        self.moves += 1
+        self.move_seconds += time.perf_counter() - start
+        return {
+            'valid': valid,
+            'score': game.scores[player] - before,
+            'scores': game.scores,
+            'current_player': game.current_player,
+        }
+
+    def op_pass(self, request):
+        game = self.game(request)
+        game.next_turn()
+        return {'scores': game.scores, 'current_player': game.current_player}
+
+    def op_undo(self, request):
+        game = self.game(request)
+        return {'done': game.undo(), 'scores': game.scores, 'current_player': game.current_player}
+
+    def op_redo(self, request):
+        game = self.game(request)
+        return {'done': game.redo(), 'scores': game.scores, 'current_player': game.current_player}
+
+    def op_state(self, request):
+        game = self.game(request)
+        board = game.board
+        rows = []
+        for row in range(board.size):
+            line = ''
+            for col in range(board.size):
+                cell = board.get_cell(row, col)
+                if not cell.letter:
+                    line += '.'
+                else:
+                    line += cell.letter.lower() if cell.blank else cell.letter
+            rows.append(line)
+        return {'board': rows, 'scores': game.scores, 'current_player': game.current_player, 'turn': game.turn}
+
+    def op_close(self, request):
+        if self.games.pop(self.game_id(request), None) is None:
+            raise RequestError('no such game')
+        return {}
+
+    def op_stats(self, request):
+        return {
+            'games': len(self.games),
+            'moves': self.moves,
+            'mean_move_us': self.move_seconds / self.moves * 1e6 if self.moves else 0,
+        }
+
+    async def serve_client(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                except ValueError:
+                    response = {'ok': False, 'error': 'bad JSON'}
+                else:
+                    if isinstance(request, dict):
+                        response = self.handle(request)
+                    else:
+                        response = {'ok': False, 'error': 'requests are JSON objects'}
+                writer.write(json.dumps(response, separators=(',', ':')).encode() + b'\n')
+                await writer.drain()
+        except (ConnectionError, asyncio.LimitOverrunError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+async def serve(host='127.0.0.1', port=DEFAULT_PORT, dictionary_path='word_list.lex'):
+    '''
+    Runs a game server until cancelled. Port 0 picks a free port, the
+    address is printed once the server is listening.
+    '''
+    server = GameServer(read_dictionary(dictionary_path))
+    listener = await asyncio.start_server(server.serve_client, host, port)
+    host, port = listener.sockets[0].getsockname()[:2]
+    print(f'listening on {host}:{port}', flush=True)
+    async with listener:
+        await listener.serve_forever()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Host many Scrabble games over a local socket.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--dictionary', default='word_list.lex')
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.dictionary))
+    except KeyboardInterrupt:
+        pass
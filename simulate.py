@@ -0,0 +1,154 @@
+import argparse
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from back import CompactBoard, Game, TILE_DISTRIBUTION
+from movegen import shared_generator
+
+class TileBag:
+    '''
+    Seeded bag of tiles.
+    '''
+    def __init__(self, rng):
+        self.rng = rng
+        self.tiles = [letter for letter, count in TILE_DISTRIBUTION.items() for _ in range(count)]
+        self.rng.shuffle(self.tiles)
+
+    def __len__(self):
+        return len(self.tiles)
+
+    def draw(self, count):
+        drawn = self.tiles[:count]
+        del self.tiles[:count]
+        return drawn
+
+    def exchange(self, tiles):
+        drawn = self.draw(len(tiles))
+        self.tiles.extend(tiles)
+        self.rng.shuffle(self.tiles)
+        return drawn
+
+def play_game(generator, seed, num_teams=2):
+    '''
+    Plays one computer-vs-computer game, every team taking its highest
+    scoring move, and returns the result as a JSON-ready dict.
+    '''
+    start = time.perf_counter()
+    rng = random.Random(seed)
+    bag = TileBag(rng)
+    game = Game(num_teams, autosave=False)
+    game.board = CompactBoard()
+    game.dictionary = generator.dictionary
+    racks = [bag.draw(7) for _ in range(num_teams)]
+
+    moves = []
+    movegen_seconds = 0
+    score_mismatches = 0
+    scoreless_turns = 0
+    while scoreless_turns < 3 * num_teams:
+        player = game.current_player
+        rack = racks[player]
+
+        movegen_start = time.perf_counter()
+        candidates = generator.generate(game.board, ''.join(rack))
+        movegen_seconds += time.perf_counter() - movegen_start
+
+        if not candidates:
+            # Exchange the whole rack if the bag allows it, pass otherwise
+            action = 'pass'
+            if len(bag) >= 7:
+                racks[player] = bag.exchange(rack)
+                action = 'exchange'
+            moves.append({'player': player, 'action': action, 'rack': ''.join(rack), 'score': 0})
+            game.next_turn()
+            scoreless_turns += 1
+            continue
+
+        move = candidates[0]
+        before = game.scores[player]
+        for row, col, letter, blank in move.tiles:
+            game.place_tile(row, col, letter, blank)
+        game.end_turn()
+
+        # Regression check, the game must agree with the move generator
+        gained = game.scores[player] - before
+        if gained != move.score:
+            score_mismatches += 1
+
+        # The rack before the play, leave values are learned from these
+        before_rack = ''.join(rack)
+        for _, _, letter, blank in move.tiles:
+            rack.remove('_' if blank else letter)
+        rack.extend(bag.draw(7 - len(rack)))
+        moves.append({
+            'player': player,
+            'action': 'play',
+            'rack': before_rack,
+            'word': move.word,
+            'tiles': move.tiles,
+            'score': gained,
+        })
+        scoreless_turns = 0 if gained else scoreless_turns + 1
+
+        # Game ends when the bag is empty and a team has used all its tiles
+        if not rack and not bag:
+            break
+
+    return {
+        'seed': seed,
+        'scores': game.scores,
+        'racks': [''.join(rack) for rack in racks],
+        'turns': len(moves),
+        'moves': moves,
+        'seconds': time.perf_counter() - start,
+        'movegen_seconds': movegen_seconds,
+        'score_mismatches': score_mismatches,
+    }
+
+def run_game(seed, num_teams, dictionary_path):
+    return play_game(shared_generator(dictionary_path), seed, num_teams)
+
+def simulate(num_games, output, seed=0, num_teams=2, workers=None, dictionary_path='word_list.lex'):
+    '''
+    Plays num_games games across a process pool, streaming each result
+    to output as one JSON line. Returns throughput statistics.
+    '''
+    workers = workers or os.cpu_count()
+    shared_generator(dictionary_path)
+
+    start = time.perf_counter()
+    cpu_seconds = 0
+    score_mismatches = 0
+    with open(output, 'w') as file, ProcessPoolExecutor(workers, initializer=shared_generator, initargs=(dictionary_path,)) as pool:
+        futures = [pool.submit(run_game, seed + i, num_teams, dictionary_path) for i in range(num_games)]
+        for future in as_completed(futures):
+            result = future.result()
+            cpu_seconds += result['seconds']
+            score_mismatches += result['score_mismatches']
+            file.write(json.dumps(result) + '\n')
+            file.flush()
+    wall_seconds = time.perf_counter() - start
+
+    return {
+        'games': num_games,
+        'workers': workers,
+        'wall_seconds': wall_seconds,
+        'games_per_second': num_games / wall_seconds,
+        'games_per_second_per_core': num_games / cpu_seconds if cpu_seconds else 0,
+        'score_mismatches': score_mismatches,
+    }
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Play computer-vs-computer games without a display.')
+    parser.add_argument('--games', type=int, default=100)
+    parser.add_argument('--teams', type=int, default=2)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--dictionary', default='word_list.lex')
+    parser.add_argument('--output', default='simulation.jsonl')
+    args = parser.parse_args()
+
+    stats = simulate(args.games, args.output, args.seed, args.teams, args.workers, args.dictionary)
+    print(json.dumps(stats))
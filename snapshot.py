@@ -0,0 +1,130 @@
+import json
+import struct
+from back import BONUS_CODES, BONUS_INDEX, Board
+
+# Binary snapshot layout (version 1):
+#   header  magic, version, board size, number of teams, current player,
+#           flags (bit 0: first word placed), turn
+#   scores  one signed 32-bit int per team
+#   letters one byte per square, 0 for empty
+#   blanks  one bit per square
+#   locked  one bit per square
+#   bonuses one nibble per square, an index into BONUS_CODES
+# A standard 2 team position is under 450 bytes.
+MAGIC = b'SCRB'
+VERSION = 1
+HEADER = struct.Struct('<4sBBBBBI')
+
+def pack_bits(flags):
+    packed = bytearray((len(flags) + 7) // 8)
+    for i, flag in enumerate(flags):
+        if flag:
+            packed[i >> 3] |= 1 << (i & 7)
+    return packed
+
+def unpack_bits(packed, count):
+    return bytearray((packed[i >> 3] >> (i & 7)) & 1 for i in range(count))
+
+def pack_nibbles(values):
+    packed = bytearray((len(values) + 1) // 2)
+    for i, value in enumerate(values):
+        packed[i >> 1] |= value << ((i & 1) * 4)
+    return packed
+
+def unpack_nibbles(packed, count):
+    return bytearray((packed[i >> 1] >> ((i & 1) * 4)) & 0xF for i in range(count))
+
+def encode_game(game):
+    '''
+    Encodes a game into a binary snapshot.
+    '''
+    board = game.board
+    letters = bytearray()
+    blanks = []
+    locked = []
+    bonuses = []
+    for row in range(board.size):
+        for col in range(board.size):
+            cell = board.get_cell(row, col)
+            letters.append(ord(cell.letter) if cell.letter else 0)
+            blanks.append(cell.blank)
+            locked.append(cell.locked)
+            bonuses.append(BONUS_INDEX[cell.bonus])
+
+    num_teams = len(game.scores)
+    flags = 1 if game.first_word_placed else 0
+    return b''.join([
+        HEADER.pack(MAGIC, VERSION, board.size, num_teams, game.current_player, flags, game.turn),
+        struct.pack(f'<{num_teams}i', *game.scores),
+        bytes(letters),
+        pack_bits(blanks),
+        pack_bits(locked),
+        pack_nibbles(bonuses),
+    ])
+
+def decode_game(buffer, board_class=Board):
+    '''
+    Decodes a binary snapshot into the same dict as a JSON save, with the
+    board already built through board_class.from_arrays.
+    '''
+    if len(buffer) < HEADER.size:
+        raise ValueError('snapshot cut short in the header')
+    magic, version, size, num_teams, current_player, flags, turn = HEADER.unpack_from(buffer, 0)
+    if magic != MAGIC:
+        raise ValueError('not a binary Scrabble snapshot')
+    if version != VERSION:
+        raise ValueError(f'unsupported snapshot version {version}')
+    if not size or not num_teams or current_player >= num_teams:
+        raise ValueError('snapshot header is corrupt')
+
+    offset = HEADER.size
+
+    def section(length, name):
+        nonlocal offset
+        if offset + length > len(buffer):
+            raise ValueError(f'snapshot cut short in the {name}')
+        offset += length
+        return buffer[offset - length:offset]
+
+    scores = list(struct.unpack(f'<{num_teams}i', section(4 * num_teams, 'scores')))
+    area = size * size
+    bits = (area + 7) // 8
+    letters = bytearray(section(area, 'letters'))
+    blanks = unpack_bits(section(bits, 'blanks'), area)
+    locked = unpack_bits(section(bits, 'locked flags'), area)
+    bonuses = unpack_nibbles(section((area + 1) // 2, 'bonuses'), area)
+    if max(bonuses) >= len(BONUS_CODES):
+        raise ValueError('snapshot has an unknown bonus')
+
+    return {
+        'board': board_class.from_arrays(size, letters, blanks, locked, bonuses),
+        'scores': scores,
+        'current_player': current_player,
+        'first_word_placed': bool(flags & 1),
+        'turn': turn,
+    }
+
+def read_game(filename, board_class=Board):
+    '''
+    Reads a saved game, binary or JSON.
+    '''
+    with open(filename, 'rb') as file:
+        data = file.read()
+    if data.startswith(MAGIC):
+        return decode_game(data, board_class)
+
+    # JSON save, convert the board back into a grid of cells
+    data = json.loads(data)
+    json_board = data['board']
+    board = board_class(len(json_board))
+    for row in range(board.size):
+        for col in range(board.size):
+            cell = json_board[row][col]
+            board.set_cell(row, col, cell['letter'], cell['blank'], cell['locked'], cell['bonus'])
+    return {
+        'board': board,
+        'scores': data['scores'],
+        'current_player': data['current_player'],
+        'first_word_placed': data['first_word_placed'],
+        'turn': data.get('turn', 0),
+    }
@@ -1,6 +1,9 @@
+import os
 import pygame
 import sys
-from front import game_screen
+from back import load_layout
+from screen_loop import LEAVE, screen_loop
+from text_cache import draw_text
 
 # Constants
 BLUE = (20, 100, 150)
@@ -10,14 +13,13 @@ BUTTON_HEIGHT = 60
 BUTTON_MARGIN = 20
 BUTTON_WIDTH = 240
 
-def draw_text(text, font, color, surface, x, y):
-    textobj = font.render(text, True, color)
-    textrect = textobj.get_rect(center=(x, y))
-    surface.blit(textobj, textrect)
-    return textrect
-
 def teams_screen(screen, WIDTH, HEIGHT, font):
-    clock = pygame.time.Clock()
+    # Imported here, the game screen pulls in the whole game
+    from front import game_screen
+
+    # New games use the board layout file in SCRABBLE_LAYOUT, if set
+    layout_path = os.environ.get('SCRABBLE_LAYOUT')
+    layout = load_layout(layout_path) if layout_path else None
 
     # Calculate button positions before the main loop
     title_x = WIDTH // 2
@@ -39,25 +41,26 @@ def teams_screen(screen, WIDTH, HEIGHT, font):
     return_button_width = button_text_rect.width + 40  # Add padding around the text
     return_button = pygame.Rect((WIDTH - return_button_width) // 2, HEIGHT - BUTTON_HEIGHT - 20, return_button_width, BUTTON_HEIGHT)
 
-    while True:
-        screen.fill(BLACK)  # Fill the screen with black
+    def handle_event(event):
+        if event.type == pygame.QUIT:
+            pygame.quit()
+            sys.exit()
+        if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+            mouse_x, mouse_y = event.pos
 
-        # Handle events
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
-            if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-                mouse_x, mouse_y = event.pos
+            # Check if 'Return to Main Menu' button is clicked
+            if return_button.collidepoint(mouse_x, mouse_y):
+                return LEAVE  # Return to main menu
 
-                # Check if 'Return to Main Menu' button is clicked
-                if return_button.collidepoint(mouse_x, mouse_y):
-                    return  # Return to main menu
+            # Check if one of the team buttons is clicked
+            for i, button in enumerate(buttons):
+                if button.collidepoint(mouse_x, mouse_y):
+                    game_screen(screen, WIDTH, HEIGHT, font, i + 2, layout=layout)  # start game with number of teams
+                    return True
+        return False
 
-                # Check if one of the team buttons is clicked
-                for i, button in enumerate(buttons):
-                    if button.collidepoint(mouse_x, mouse_y):
-                        game_screen(screen, WIDTH, HEIGHT, font, i + 2)  # start game with number of teams
+    def render():
+        screen.fill(BLACK)  # Fill the screen with black
 
         draw_text('How many teams?', font, WHITE, screen, title_x, title_y)
 
@@ -73,4 +76,5 @@ def teams_screen(screen, WIDTH, HEIGHT, font):
 
         # Update the display
         pygame.display.flip()
-        clock.tick(60)
+
+    screen_loop(handle_event, render)
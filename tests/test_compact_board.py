@@ -0,0 +1,92 @@
+import os
+import pytest
+from back import Board, CompactBoard
+from lexicon import Lexicon
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# CAT across the center, then COT down from its C
+TILES = [(7, 7, 'C'), (7, 8, 'A'), (7, 9, 'T'), (8, 7, 'O'), (9, 7, 'T')]
+
+@pytest.fixture(scope='module')
+def dictionary():
+    return Lexicon(os.path.join(ROOT, 'word_list.lex'))
+
+def lock(board, tiles, dictionary):
+    for row, col, letter in tiles:
+        board.set_cell(row, col, letter, False, True, board.get_cell(row, col).bonus)
+    board.update_cross_checks(dictionary, [(row, col) for row, col, _ in tiles])
+
+def squares(board):
+    cells = [board.get_cell(row, col) for row in range(board.size) for col in range(board.size)]
+    return [(cell.letter, cell.blank, cell.locked, cell.bonus) for cell in cells]
+
+def cache(board):
+    return (
+        {key: list(value) for key, value in board.cross_checks.items()},
+        {key: list(value) for key, value in board.cross_sums.items()},
+        list(board.anchors),
+    )
+
+def test_copy_is_copy_on_write(dictionary):
+    board = CompactBoard()
+    board.compute_cross_checks(dictionary)
+    lock(board, TILES[:3], dictionary)
+    before = (squares(board), cache(board))
+
+    copy = board.copy()
+    assert copy.letters is board.letters
+    assert copy.cross_checks is board.cross_checks
+
+    lock(copy, TILES[3:], dictionary)
+    copy.get_cell(0, 0).letter = 'Q'
+    assert copy.letters is not board.letters
+    assert copy.cross_checks is not board.cross_checks
+    assert (squares(board), cache(board)) == before
+    assert board.verify_cross_checks(dictionary) == []
+    assert copy.verify_cross_checks(dictionary) == []
+
+    # The original writing after the copy leaves the copy alone as well
+    after = (squares(copy), cache(copy))
+    board.set_cell(14, 14, 'Z')
+    lock(board, [(6, 8, 'B')], dictionary)
+    assert (squares(copy), cache(copy)) == after
+
+def test_cell_view_reads_and_writes():
+    board = CompactBoard()
+    cell = board.get_cell(3, 4)
+    assert (cell.letter, cell.blank, cell.locked) == (None, False, False)
+    assert cell.bonus == Board().get_cell(3, 4).bonus
+
+    cell.letter = 'E'
+    cell.blank = True
+    cell.locked = True
+    cell.bonus = None
+    view = board.get_cell(3, 4)
+    assert (view.letter, view.blank, view.locked, view.bonus) == ('E', True, True, None)
+    assert board.has_tile(3, 4)
+    assert board.letters[3 * board.size + 4] == ord('E')
+
+    copy = board.copy()
+    copy.get_cell(3, 4).letter = None
+    assert not copy.has_tile(3, 4)
+    assert board.get_cell(3, 4).letter == 'E'
+
+def test_from_board_matches_board(dictionary):
+    board = Board()
+    board.compute_cross_checks(dictionary)
+    lock(board, TILES, dictionary)
+    board.set_letter(10, 10, 'S', True)
+
+    compact = CompactBoard.from_board(board)
+    assert squares(compact) == squares(board)
+    assert all(compact.has_tile(row, col) == board.has_tile(row, col) for row in range(board.size) for col in range(board.size))
+    assert cache(compact) == cache(board)
+    assert compact.verify_cross_checks(dictionary) == []
+
+    # Both kinds of board keep the same cache as play goes on
+    more = [(6, 9, 'A'), (8, 9, 'O')]
+    lock(board, more, dictionary)
+    lock(compact, more, dictionary)
+    assert squares(compact) == squares(board)
+    assert cache(compact) == cache(board)
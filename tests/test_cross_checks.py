@@ -0,0 +1,26 @@
+import os
+from back import Game
+from lexicon import Lexicon
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def play(game, tiles):
+    for row, col, letter in tiles:
+        game.place_tile(row, col, letter)
+    game.end_turn()
+
+def test_cache_built_once_is_kept_current():
+    game = Game(2, autosave=False)
+    game.dictionary = Lexicon(os.path.join(ROOT, 'word_list.lex'))
+    game.build_cross_checks()
+    cache = game.board.cross_checks
+    assert cache is not None
+
+    play(game, [(7, 7, 'C'), (7, 8, 'A'), (7, 9, 'T')])
+    play(game, [(8, 9, 'O'), (9, 9, 'E')])
+    assert game.scores[0] > 0 and game.scores[1] > 0
+    assert game.board.cross_checks is cache
+    assert game.board.verify_cross_checks(game.dictionary) == []
+
+    game.undo()
+    assert game.board.verify_cross_checks(game.dictionary) == []
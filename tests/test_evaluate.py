@@ -0,0 +1,106 @@
+import os
+import pytest
+from back import Game
+from evaluate import evaluate_move, evaluate_moves
+from lexicon import Lexicon
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# CAT across the center, locked before the later plays are tried
+CAT = [(7, 7, 'C', False), (7, 8, 'A', False), (7, 9, 'T', False)]
+
+FIRST_PLAYS = [
+    CAT,
+    # Off the center square
+    [(3, 3, 'C', False), (3, 4, 'A', False), (3, 5, 'T', False)],
+    # A blank for the A
+    [(7, 6, 'C', False), (7, 7, 'A', True), (7, 8, 'T', False)],
+    [(7, 7, 'Q', False), (7, 8, 'X', False)],
+    [(7, 7, 'A', False), (8, 8, 'T', False)],
+]
+
+LATER_PLAYS = [
+    # Disconnected
+    [(0, 0, 'D', False), (0, 1, 'O', False), (0, 2, 'G', False)],
+    [(7, 10, 'S', False)],
+    [(7, 10, 'S', True)],
+    [(8, 7, 'O', False), (9, 7, 'W', False)],
+    [(8, 7, 'O', True), (9, 7, 'W', False)],
+    # Along the bottom of CAT, making words both ways
+    [(8, 8, 'T', False), (8, 9, 'O', False)],
+    [(8, 7, 'Z', False), (8, 8, 'Q', False)],
+    # A gap, and two lines
+    [(8, 7, 'O', False), (10, 7, 'W', False)],
+    [(8, 7, 'O', False), (9, 8, 'W', False)],
+    [(6, 7, 'S', False), (6, 8, 'C', False), (6, 9, 'A', False), (6, 10, 'T', False)],
+    # All seven tiles down through the A
+    [(1, 8, 'O', False), (2, 8, 'R', False), (3, 8, 'I', False), (4, 8, 'E', False), (5, 8, 'N', False), (6, 8, 'T', False), (8, 8, 'L', False)],
+]
+
+@pytest.fixture(scope='module')
+def dictionary():
+    return Lexicon(os.path.join(ROOT, 'word_list.lex'))
+
+def new_game(dictionary, first_word_placed):
+    game = Game(2, autosave=False)
+    game.dictionary = dictionary
+    if first_word_placed:
+        for tile in CAT:
+            game.place_tile(*tile)
+        assert game.check_word_valid()
+        game.end_turn()
+    return game
+
+def game_verdict(game, tiles):
+    '''
+    (reason, words, points) the game gives for tiles, reason being None
+    for a valid play, 'word' when a word isn't in the dictionary and
+    'play' when the tiles break another rule.
+    '''
+    for tile in tiles:
+        game.place_tile(*tile)
+    player = game.current_player
+    before = game.scores[player]
+    valid = game.check_word_valid()
+    reason, words, points = 'play', [], 0
+    if valid:
+        game.update_score()
+        reason, points = None, game.scores[player] - before
+        game.scores[player] = before
+    elif game.main_word_tiles:
+        # The tiles made it to the dictionary check
+        reason = 'word'
+    if game.main_word_tiles:
+        words = [''.join(cell.letter for cell in word) for word in [game.main_word_tiles] + game.secondary_word_tiles]
+    game.clear_placed_tiles()
+    return reason, words, points
+
+def preview_verdict(evaluation):
+    if evaluation.valid:
+        return None, evaluation.words, evaluation.score
+    return ('word' if evaluation.words else 'play'), evaluation.words, 0
+
+@pytest.mark.parametrize('first_word_placed, tiles', [(False, tiles) for tiles in FIRST_PLAYS] + [(True, tiles) for tiles in LATER_PLAYS])
+def test_preview_agrees_with_game(dictionary, first_word_placed, tiles):
+    game = new_game(dictionary, first_word_placed)
+    expected = game_verdict(game, tiles)
+    assert preview_verdict(evaluate_move(game.board, tiles, dictionary, first_word_placed)) == expected
+
+    # Same with the tiles already typed on the board, as the preview sees them
+    for tile in tiles:
+        game.place_tile(*tile)
+    assert preview_verdict(evaluate_move(game.board, tiles, dictionary, first_word_placed)) == expected
+    game.clear_placed_tiles()
+
+def test_batch_agrees_with_single_moves(dictionary):
+    game = new_game(dictionary, True)
+    batch = evaluate_moves(game.board, LATER_PLAYS, dictionary)
+    single = [evaluate_move(game.board, tiles, dictionary) for tiles in LATER_PLAYS]
+    assert [preview_verdict(evaluation) for evaluation in batch] == [preview_verdict(evaluation) for evaluation in single]
+
+def test_cases_cover_each_verdict(dictionary):
+    verdicts = set()
+    for first_word_placed, plays in ((False, FIRST_PLAYS), (True, LATER_PLAYS)):
+        for tiles in plays:
+            verdicts.add(game_verdict(new_game(dictionary, first_word_placed), tiles)[0])
+    assert verdicts == {None, 'word', 'play'}
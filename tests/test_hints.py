@@ -0,0 +1,57 @@
+import os
+import threading
+from back import Game
+from hints import HintEngine
+from lexicon import Lexicon
+from movegen import MoveGenerator
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def search(engine, game, rack, version):
+    done = threading.Event()
+    engine.on_done = done.set
+    engine.request(game.board, rack, version)
+    assert done.wait(30)
+    return engine.results()
+
+def new_engine(budget):
+    game = Game(2, autosave=False)
+    game.dictionary = Lexicon(os.path.join(ROOT, 'word_list.lex'))
+    return HintEngine(game.dictionary, budget), game
+
+def test_stopped_search_looks_all_over_the_board():
+    _, game = new_engine(1)
+    # A word near the top, and one next to the triple word in the bottom row
+    for row, col, letter in [(2, 9, 'C'), (2, 10, 'A'), (2, 11, 'T'), (13, 6, 'D'), (13, 7, 'O'), (13, 8, 'G')]:
+        game.board.set_cell(row, col, letter, False, True, game.board.get_cell(row, col).bonus)
+    generator = MoveGenerator(game.dictionary)
+    every = {frozenset(move.tiles): move.score for move in generator.generate(game.board, 'AEIRST')}
+
+    checks = 0
+
+    def stop():
+        nonlocal checks
+        checks += 1
+        return checks > 3
+
+    found = generator.generate(game.board, 'AEIRST', stop)
+    assert found
+    assert all(every[frozenset(move.tiles)] == move.score for move in found)
+    assert any(row > 7 for move in found for row, _, _, _ in move.tiles)
+
+def test_budget_running_out_is_reported():
+    engine, game = new_engine(0)
+    version, moves, complete = search(engine, game, 'ERS__AT', 1)
+    assert version == 1 and moves == [] and not complete
+    assert not engine.searching()
+
+def test_failed_search_is_reported():
+    engine, game = new_engine(1)
+    search(engine, game, 'CAT', 0)
+
+    def fail(*args):
+        raise RuntimeError('search failed')
+
+    engine.generator.generate = fail
+    assert search(engine, game, 'CAT', 1) == (1, None, False)
+    assert not engine.searching()
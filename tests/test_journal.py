@@ -0,0 +1,37 @@
+import json
+from journal import TurnJournal, journal_path, read_journal
+
+def record(turn, player=0, score=5):
+    return {'turn': turn, 'player': player, 'tiles': [[7, 7 + turn, 'A', False]], 'score': score}
+
+def write_lines(path, lines):
+    with open(path, 'w') as file:
+        file.write(''.join(lines))
+
+def test_reload_after_torn_line_keeps_later_turns(tmp_path):
+    snapshot = str(tmp_path / 'scrabble_game.json')
+    path = journal_path(snapshot)
+    # A crash tore the third record
+    write_lines(path, [json.dumps(record(1)) + '\n', json.dumps(record(2)) + '\n', '{"turn":3,"pla'])
+
+    journal = TurnJournal(snapshot, compact_every=100)
+    for turn in (3, 4, 5):
+        journal.append(None, record(turn))
+    journal.close()
+
+    assert [r['turn'] for r in read_journal(path)] == [1, 2, 3, 4, 5]
+
+def test_read_journal_skips_bad_middle_line(tmp_path):
+    path = str(tmp_path / 'scrabble_game.journal')
+    write_lines(path, [
+        json.dumps(record(1)) + '\n',
+        '{"turn":2,"pl' + json.dumps(record(3)) + '\n',
+        json.dumps(record(4)) + '\n',
+        '{"turn":5',
+    ])
+    assert [r['turn'] for r in read_journal(path)] == [1, 4]
+
+def test_read_journal_after_snapshot_turn(tmp_path):
+    path = str(tmp_path / 'scrabble_game.journal')
+    write_lines(path, [json.dumps(record(turn)) + '\n' for turn in (1, 2, 3)])
+    assert [r['turn'] for r in read_journal(path, after_turn=2)] == [3]
@@ -0,0 +1,18 @@
+import os
+import pytest
+from leaves import LeaveTable
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@pytest.fixture(scope='module')
+def table():
+    return LeaveTable(os.path.join(ROOT, 'leaves.bin'))
+
+def test_leave_values_make_sense(table):
+    # The blank and the S help, the Q and duplicates hurt
+    assert table.value('_') > table.value('Q')
+    assert table.value('S') > table.value('Q')
+    assert table.value('Q') < 0 and table.value('UU') < 0
+    # A leave close to a bingo beats a smaller good one
+    assert table.value('AEINST') > table.value('ERS')
+    assert table.value('S_') > table.value('S')
@@ -0,0 +1,155 @@
+import os
+import random
+import time
+from itertools import permutations, product
+import pytest
+from back import ALPHABET, Game
+from lexicon import Lexicon
+from movegen import MoveGenerator
+from simulate import TileBag
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (seed, turns played before the rack is tried), turn 0 is the first move
+POSITIONS = [(1, 0), (1, 4), (2, 2), (3, 6), (4, 9)]
+
+@pytest.fixture(scope='module')
+def generator():
+    return MoveGenerator(Lexicon(os.path.join(ROOT, 'word_list.lex')))
+
+def play_out(generator, seed, turns):
+    '''
+    A game after turns top scoring plays drawn from a seeded bag.
+    '''
+    game = Game(2, autosave=False)
+    game.dictionary = generator.dictionary
+    bag = TileBag(random.Random(seed))
+    racks = [bag.draw(7), bag.draw(7)]
+    for _ in range(turns):
+        rack = racks[game.current_player]
+        move = generator.generate(game.board, ''.join(rack))[0]
+        for tile in move.tiles:
+            game.place_tile(*tile)
+        game.end_turn()
+        for _, _, letter, blank in move.tiles:
+            rack.remove('_' if blank else letter)
+        rack.extend(bag.draw(7 - len(rack)))
+    return game
+
+def game_score(game, tiles):
+    '''
+    Points the game gives for tiles, or None when it rejects them.
+    '''
+    for tile in tiles:
+        game.place_tile(*tile)
+    player = game.current_player
+    before = game.scores[player]
+    score = None
+    if game.check_word_valid():
+        game.update_score()
+        score = game.scores[player] - before
+        game.scores[player] = before
+    game.clear_placed_tiles()
+    return score
+
+def squares_to_fill(game, count):
+    '''
+    Every run of up to count empty squares in a row or column, gaps filled
+    by tiles on the board, that touches a tile or covers the center.
+    '''
+    board = game.board
+    center = board.size // 2
+    for horizontal in (True, False):
+        for line in range(board.size):
+            for start in range(board.size):
+                squares = []
+                for i in range(start, board.size):
+                    square = (line, i) if horizontal else (i, line)
+                    if board.has_tile(*square):
+                        if not squares:
+                            break
+                        continue
+                    squares.append(square)
+                    if game.first_word_placed:
+                        touches = any(game.is_connected(*square) for square in squares)
+                    else:
+                        touches = (center, center) in squares
+                    if touches:
+                        yield list(squares)
+                    if len(squares) == count:
+                        break
+
+def word_key(tiles):
+    '''
+    The squares and letters of a play, whichever tiles are the blanks.
+    '''
+    return frozenset((row, col, letter) for row, col, letter, _ in tiles)
+
+def every_play(game, rack):
+    '''
+    {squares and letters: (blanks, points)} for every play of rack the game
+    accepts, found by trying every arrangement of the rack on every run of
+    squares. Of the ways to place the blanks for the same word, the one
+    using the fewest and then scoring the most is kept.
+    '''
+    plays = {}
+    tried = set()
+    for squares in squares_to_fill(game, len(rack)):
+        for tiles in set(permutations(rack, len(squares))):
+            choices = [[(letter, False)] if letter != '_' else [(blank, True) for blank in ALPHABET] for letter in tiles]
+            for letters in product(*choices):
+                placed = [square + letter for square, letter in zip(squares, letters)]
+                if frozenset(placed) in tried:
+                    continue
+                tried.add(frozenset(placed))
+                score = game_score(game, placed)
+                if score is None:
+                    continue
+                key = word_key(placed)
+                play = (sum(blank for _, _, _, blank in placed), -score)
+                if key not in plays or play < plays[key]:
+                    plays[key] = play
+    return {key: (blanks, -score) for key, (blanks, score) in plays.items()}
+
+def generated(generator, game, rack):
+    moves = generator.generate(game.board, rack)
+    plays = {word_key(move.tiles): (sum(blank for _, _, _, blank in move.tiles), move.score) for move in moves}
+    assert len(plays) == len(moves)
+    return plays
+
+@pytest.mark.parametrize('seed, turns', POSITIONS)
+@pytest.mark.parametrize('rack', ['RATE', 'QIS', 'E_', 'S_N'])
+def test_small_racks_find_every_play(generator, seed, turns, rack):
+    game = play_out(generator, seed, turns)
+    assert generated(generator, game, rack) == every_play(game, rack)
+
+@pytest.mark.parametrize('seed, turns', POSITIONS)
+@pytest.mark.parametrize('rack', ['AEIRST_', 'ERS__AT', 'ZQXJ_KV'])
+def test_full_racks_score_like_the_game(generator, seed, turns, rack):
+    game = play_out(generator, seed, turns)
+    moves = generator.generate(game.board, rack)
+    assert moves
+    assert len({word_key(move.tiles) for move in moves}) == len(moves)
+    # Every move would take too long, check the best ones and a sample
+    sample = moves[:100] + random.Random(seed).sample(moves, min(len(moves), 300))
+    for move in sample:
+        assert game_score(game, move.tiles) == move.score, move
+
+def test_blank_racks_stay_quick(generator):
+    # Blanks widen the search, but it should stay within a small multiple
+    # of the time for a rack without them
+    games = [play_out(generator, seed, turns) for seed, turns in [(2, 2), (4, 9)]]
+
+    def seconds(rack):
+        best = None
+        for _ in range(2):
+            start = time.perf_counter()
+            for game in games:
+                generator.generate(game.board, rack)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    plain = seconds('AEIRSTN')
+    assert seconds('AEIRST_') < 9 * plain
+    assert seconds('ERS__AT') < 25 * plain
@@ -0,0 +1,65 @@
+import asyncio
+import json
+import pytest
+from server import GameServer
+
+@pytest.fixture
+def server():
+    return GameServer({'CAT', 'CATS'})
+
+def new_game(server):
+    response = server.handle({'op': 'new'})
+    assert response['ok']
+    return response['game']
+
+@pytest.mark.parametrize('game', [[1], {'id': 1}, '1', 1.0, True, None])
+def test_game_of_the_wrong_type_is_refused(server, game):
+    new_game(server)
+    for op in ('state', 'play', 'pass', 'undo', 'redo', 'close'):
+        response = server.handle({'op': op, 'game': game, 'tiles': [[7, 7, 'A', False]]})
+        assert response == {'ok': False, 'error': 'game must be a game number'}
+
+@pytest.mark.parametrize('player', [[0], '0', 0.5, False])
+def test_player_of_the_wrong_type_is_refused(server, player):
+    game = new_game(server)
+    response = server.handle({'op': 'pass', 'game': game, 'player': player})
+    assert response == {'ok': False, 'error': 'player must be a number'}
+
+@pytest.mark.parametrize('teams', [True, False, '2', 2.0, 0, 5])
+def test_teams_of_the_wrong_type_are_refused(server, teams):
+    response = server.handle({'op': 'new', 'teams': teams})
+    assert response == {'ok': False, 'error': 'teams must be 1 to 4'}
+
+@pytest.mark.parametrize('row, col', [(True, 7), (7, False), (7.0, 7), ('7', 7)])
+def test_squares_of_the_wrong_type_are_refused(server, row, col):
+    game = new_game(server)
+    response = server.handle({'op': 'play', 'game': game, 'tiles': [[row, col, 'A', False]]})
+    assert response == {'ok': False, 'error': 'tile outside the board'}
+
+def test_unexpected_error_is_answered(server, monkeypatch):
+    game = new_game(server)
+
+    def fail(request):
+        raise TypeError('unhashable type')
+
+    monkeypatch.setattr(server, 'op_state', fail)
+    response = server.handle({'op': 'state', 'game': game})
+    assert not response['ok'] and response['error'].startswith('internal error')
+
+def test_connection_survives_bad_requests(server):
+    async def talk():
+        listener = await asyncio.start_server(server.serve_client, '127.0.0.1', 0)
+        port = listener.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        responses = []
+        for request in ({'op': 'new'}, {'op': 'state', 'game': [1]}, {'op': 'state', 'game': 1}):
+            writer.write(json.dumps(request).encode() + b'\n')
+            await writer.drain()
+            responses.append(json.loads(await reader.readline()))
+        writer.close()
+        listener.close()
+        await listener.wait_closed()
+        return responses
+
+    created, refused, state = asyncio.run(talk())
+    assert created['ok'] and not refused['ok'] and state['ok']
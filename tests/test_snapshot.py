@@ -0,0 +1,35 @@
+import pytest
+from back import CompactBoard, Game
+from snapshot import HEADER, decode_game, encode_game
+
+def sample_game():
+    game = Game(3, autosave=False)
+    for row, col, letter, blank in [(7, 7, 'C', False), (7, 8, 'A', True), (7, 9, 'T', False)]:
+        game.board.set_cell(row, col, letter, blank, True, game.board.get_cell(row, col).bonus)
+    game.scores = [12, -3, 0]
+    game.current_player = 1
+    game.first_word_placed = True
+    game.turn = 4
+    return game
+
+def test_snapshot_round_trip():
+    game = sample_game()
+    data = decode_game(encode_game(game), CompactBoard)
+    assert (data['scores'], data['current_player'], data['first_word_placed'], data['turn']) == ([12, -3, 0], 1, True, 4)
+    for row in range(game.board.size):
+        for col in range(game.board.size):
+            cell, decoded = game.board.get_cell(row, col), data['board'].get_cell(row, col)
+            assert (decoded.letter, decoded.blank, decoded.locked, decoded.bonus) == (cell.letter, cell.blank, cell.locked, cell.bonus)
+
+def test_cut_short_snapshot_is_a_value_error():
+    buffer = encode_game(sample_game())
+    for length in list(range(HEADER.size + 20)) + list(range(len(buffer) - 120, len(buffer))):
+        with pytest.raises(ValueError):
+            decode_game(buffer[:length])
+
+def test_corrupt_header_is_a_value_error():
+    buffer = bytearray(encode_game(sample_game()))
+    # Current player 3 of a 3 team game
+    buffer[7] = 3
+    with pytest.raises(ValueError):
+        decode_game(bytes(buffer))
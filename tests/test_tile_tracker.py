@@ -0,0 +1,65 @@
+from itertools import combinations
+import pytest
+from back import Board
+from tile_tracker import KIND_INDEX, TILE_KINDS, TileTracker
+
+# A bag small enough to draw every combination of its tiles
+BAG = 'AAEEIQRST_'
+
+class Finder:
+    '''
+    Stands in for a WordFinder, a rack makes a word if its sorted tiles
+    are one of racks.
+    '''
+    def __init__(self, racks):
+        self.racks = {''.join(sorted(rack)) for rack in racks}
+
+    def anagrams(self, rack):
+        return [rack] if ''.join(sorted(rack)) in self.racks else []
+
+def small_tracker(bag=BAG):
+    tracker = TileTracker(Board())
+    tracker.counts = bytearray(len(TILE_KINDS))
+    for tile in bag:
+        tracker.counts[KIND_INDEX[tile]] += 1
+    tracker.total = len(bag)
+    return tracker
+
+def brute_force(count, test, bag=BAG):
+    '''
+    Share of the ways to draw count of the bag's tiles, each tile told
+    apart from the others, whose letters pass test.
+    '''
+    draws = [''.join(bag[i] for i in chosen) for chosen in combinations(range(len(bag)), count)]
+    return sum(1 for drawn in draws if test(drawn)) / len(draws)
+
+def holds(drawn, tiles):
+    return all(drawn.count(tile) >= tiles.count(tile) for tile in set(tiles))
+
+@pytest.mark.parametrize('tiles', ['A', 'AA', 'QU', 'Q_', 'AEI', 'EE_'])
+@pytest.mark.parametrize('draw', [1, 3, 5])
+def test_chance_draw_matches_every_draw(tiles, draw):
+    expected = brute_force(draw, lambda drawn: holds(drawn, tiles))
+    assert small_tracker().chance_draw(tiles, draw) == pytest.approx(expected)
+
+@pytest.mark.parametrize('tiles', ['Q', '_', 'AE', 'U'])
+def test_chance_holds_matches_every_rack(tiles):
+    expected = brute_force(7, lambda drawn: any(tile in drawn for tile in tiles))
+    assert small_tracker().chance_holds(tiles) == pytest.approx(expected)
+
+@pytest.mark.parametrize('keep', ['SATIRE', 'RATE', 'EAST', 'RETAINS'])
+def test_bingo_chance_matches_every_draw(keep):
+    finder = Finder(['AEIRSTT', 'AEIRST_', 'AAERSTE', 'AEEIRST', 'RETAINS'])
+    expected = brute_force(7 - len(keep), lambda drawn: finder.anagrams(keep + drawn))
+    assert small_tracker().bingo_chance(keep, finder) == pytest.approx(expected)
+
+def test_bad_input_is_a_value_error():
+    tracker = small_tracker()
+    with pytest.raises(ValueError, match='at least 3'):
+        tracker.bingo_chance('QI', Finder([]))
+    with pytest.raises(ValueError, match='at most 7'):
+        tracker.bingo_chance('AEINRSTT', Finder([]))
+    with pytest.raises(ValueError, match="'1'"):
+        tracker.chance_draw('Q1', 3)
+    with pytest.raises(ValueError, match="'\\*'"):
+        TileTracker(Board(), 'AB*')
@@ -0,0 +1,34 @@
+import os
+import random
+from collections import Counter
+import pytest
+from lexicon import Lexicon
+from word_finder import WordFinder
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@pytest.fixture(scope='module')
+def words():
+    # Every 20th word keeps the brute force checks quick
+    return list(Lexicon(os.path.join(ROOT, 'word_list.lex')))[::20]
+
+@pytest.fixture(scope='module')
+def finder(words):
+    return WordFinder(words)
+
+def playable(word, rack):
+    missing = Counter(word) - Counter(rack.replace('_', ''))
+    return sum(missing.values()) <= rack.count('_') and len(word) <= len(rack)
+
+@pytest.mark.parametrize('rack', ['AEIRSTN', 'AEIRST_', 'ERS__AT', 'QZ__', '__', 'retains'])
+def test_find_matches_brute_force(words, finder, rack):
+    rack = rack.upper()
+    expected = sorted((word for word in words if playable(word, rack)), key=lambda word: (-len(word), word))
+    assert finder.sub_anagrams(rack) == expected
+    assert finder.anagrams(rack) == [word for word in expected if len(word) == len(rack)]
+
+def test_contains_matches_brute_force(words, finder):
+    fragments = ['', 'E', 'QU', 'ING', 'TION', 'ZZ', 'XYZ', 'ss']
+    fragments += [word[1:4] for word in random.Random(0).sample(words, 20)]
+    for fragment in fragments:
+        assert finder.contains(fragment) == [word for word in words if fragment.upper() in word]
@@ -0,0 +1,47 @@
+from collections import OrderedDict
+
+# Rendered text surfaces, least recently used first
+MAX_SURFACES = 512
+surfaces = OrderedDict()
+stats = {'hits': 0, 'misses': 0}
+
+def render_text(text, font, color):
+    '''
+    Get the rendered surface for text, rendering it only on a cache miss.
+    '''
+    key = (text, font, color)
+    surface = surfaces.get(key)
+    if surface is not None:
+        surfaces.move_to_end(key)
+        stats['hits'] += 1
+        return surface
+
+    stats['misses'] += 1
+    surface = font.render(text, True, color)
+    surfaces[key] = surface
+    if len(surfaces) > MAX_SURFACES:
+        surfaces.popitem(last=False)
+    return surface
+
+def draw_text(text, font, color, surface, x, y, align='center'):
+    '''
+    Draw text at (x, y), centered or from its top left corner.
+    '''
+    textobj = render_text(text, font, color)
+    if align == 'topleft':
+        textrect = textobj.get_rect(topleft=(x, y))
+    else:
+        textrect = textobj.get_rect(center=(x, y))
+    surface.blit(textobj, textrect)
+    return textrect
+
+def cache_info():
+    '''
+    Hit and miss counters and the number of cached surfaces.
+    '''
+    return {'hits': stats['hits'], 'misses': stats['misses'], 'size': len(surfaces)}
+
+def clear_cache():
+    surfaces.clear()
+    stats['hits'] = 0
+    stats['misses'] = 0
@@ -0,0 +1,158 @@
+import sys
+from functools import lru_cache
+from back import ALPHABET, TILE_DISTRIBUTION
+
+# Tile kinds in the order of a counts array, the blank last
+TILE_KINDS = ALPHABET + '_'
+KIND_INDEX = {tile: i for i, tile in enumerate(TILE_KINDS)}
+FULL_COUNTS = bytes(TILE_DISTRIBUTION.get(tile, 0) for tile in TILE_KINDS)
+RACK_SIZE = 7
+
+# Binomial coefficients up to a whole bag, BINOMIALS[n][k] is n choose k
+MAX_TILES = 100
+BINOMIALS = [[1]]
+for n in range(1, MAX_TILES + 1):
+    above = BINOMIALS[-1]
+    BINOMIALS.append([1] + [above[k - 1] + above[k] for k in range(1, n)] + [1])
+
+def binomial(n, k):
+    if k < 0 or k > n:
+        return 0
+    return BINOMIALS[n][k]
+
+def kind_index(tile):
+    '''
+    Index of a tile ('_' for a blank) in a counts array.
+    '''
+    index = KIND_INDEX.get(tile)
+    if index is None:
+        raise ValueError(f'{tile!r} is not a tile')
+    return index
+
+def unseen_counts(board, racks=()):
+    '''
+    Counts of every tile kind not locked on the board and not in racks
+    ('_' for blanks), as a bytearray indexed like TILE_KINDS.
+    '''
+    counts = bytearray(FULL_COUNTS)
+    for row in range(board.size):
+        for col in range(board.size):
+            if board.has_tile(row, col):
+                cell = board.get_cell(row, col)
+                index = KIND_INDEX['_' if cell.blank else cell.letter]
+                counts[index] = max(counts[index] - 1, 0)
+    for rack in racks:
+        for tile in rack.upper():
+            index = kind_index(tile)
+            counts[index] = max(counts[index] - 1, 0)
+    return counts
+
+@lru_cache(maxsize=65536)
+def ways_at_least(available, needed, others, draw):
+    '''
+    Number of ways to draw draw tiles with at least needed[i] of each kind
+    that has available[i] tiles, others being the tiles of all other kinds.
+    '''
+    if not available:
+        return binomial(others, draw)
+    first, rest = available[0], available[1:]
+    total = 0
+    for taken in range(needed[0], min(first, draw) + 1):
+        total += binomial(first, taken) * ways_at_least(rest, needed[1:], others, draw - taken)
+    return total
+
+class TileTracker:
+    '''
+    Tiles one player hasn't seen yet (the bag and the other racks) and
+    exact odds of drawing them. Everything unseen is equally likely to be
+    in the bag or on another rack, so draws and racks follow the
+    hypergeometric distribution.
+    '''
+    def __init__(self, board, rack='', other_racks=()):
+        self.counts = unseen_counts(board, (rack,) + tuple(other_racks))
+        self.total = sum(self.counts)
+
+    def unseen(self):
+        '''
+        Unseen tiles as {tile: count}, leaving out tiles all accounted for.
+        '''
+        return {tile: self.counts[i] for i, tile in enumerate(TILE_KINDS) if self.counts[i]}
+
+    def chance_draw(self, tiles, draw):
+        '''
+        Chance that draw tiles taken from the unseen tiles include all of
+        tiles, e.g. chance_draw('QU', 3).
+        '''
+        draw = min(draw, self.total)
+        needed = {}
+        for tile in tiles.upper():
+            index = kind_index(tile)
+            needed[index] = needed.get(index, 0) + 1
+        if sum(needed.values()) > draw:
+            return 0.0
+        kinds = sorted(needed)
+        available = tuple(self.counts[i] for i in kinds)
+        others = self.total - sum(available)
+        ways = ways_at_least(available, tuple(needed[i] for i in kinds), others, draw)
+        return ways / binomial(self.total, draw)
+
+    def chance_holds(self, tiles, rack_size=RACK_SIZE):
+        '''
+        Chance that an opponent's rack holds at least one of the given
+        tile kinds, e.g. chance_holds('Q') or chance_holds('_').
+        '''
+        rack_size = min(rack_size, self.total)
+        missing = self.total - sum(self.counts[kind_index(tile)] for tile in set(tiles.upper()))
+        return 1 - binomial(missing, rack_size) / binomial(self.total, rack_size)
+
+    def bingo_chance(self, keep, finder):
+        '''
+        Chance that keeping keep and drawing up to a full rack gives a rack
+        that makes a word with all its tiles. finder is a WordFinder, keep
+        has to be 3 to 7 tiles so there are few draws to go through.
+        '''
+        keep = keep.upper()
+        if len(keep) > RACK_SIZE:
+            raise ValueError(f'keep at most {RACK_SIZE} tiles')
+        draw = min(RACK_SIZE - len(keep), self.total)
+        if draw > 4:
+            raise ValueError('keep at least 3 tiles')
+        if draw == 0:
+            return 1.0 if finder.anagrams(keep) else 0.0
+
+        hits = 0
+        for drawn, ways in self.draws(draw):
+            if finder.anagrams(keep + drawn):
+                hits += ways
+        return hits / binomial(self.total, draw)
+
+    def draws(self, draw, start=0):
+        '''
+        Every distinct set of draw tiles that can be drawn, with the
+        number of ways to draw it.
+        '''
+        if draw == 0:
+            yield '', 1
+            return
+        for i in range(start, len(TILE_KINDS)):
+            for taken in range(1, min(self.counts[i], draw) + 1):
+                ways = binomial(self.counts[i], taken)
+                for rest, rest_ways in self.draws(draw - taken, i + 1):
+                    yield TILE_KINDS[i] * taken + rest, ways * rest_ways
+
+if __name__ == '__main__':
+    # Usage: python tile_tracker.py [RACK [KEEP]], for the saved game
+    from load_game import read_saved_game
+    from word_finder import load_word_finder
+
+    data = read_saved_game()
+    if data is None:
+        sys.exit('no saved game')
+    rack = sys.argv[1] if len(sys.argv) > 1 else ''
+    tracker = TileTracker(data['board'], rack)
+    print(f'{tracker.total} unseen:', ' '.join(f'{tile}{count}' for tile, count in tracker.unseen().items()))
+    for tiles, name in (('Q', 'Q'), ('_', 'a blank'), ('S', 'an S')):
+        print(f'Opponent holds {name}: {tracker.chance_holds(tiles):.1%}')
+    if len(sys.argv) > 2:
+        keep = sys.argv[2]
+        print(f'Bingo keeping {keep}: {tracker.bingo_chance(keep, load_word_finder()):.1%}')
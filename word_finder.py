@@ -0,0 +1,182 @@
+import bisect
+import os
+import pickle
+import re
+import sys
+from dictionary import read_dictionary
+
+# Most tiles a rack holds
+RACK_SIZE = 7
+CACHE_VERSION = 2
+
+def signature(letters):
+    '''
+    Letters in sorted order, shared by all anagrams of a word.
+    '''
+    return ''.join(sorted(letters))
+
+class WordFinder:
+    '''
+    Answers "what can I make with this rack?" and pattern queries.
+
+    Words are indexed by signature, and words of up to RACK_SIZE letters
+    also by every signature left after taking one letter out, which is
+    what a blank fills in. For contains, every letter and pair of letters
+    maps to the words containing it, in sorted order.
+    '''
+    def __init__(self, words):
+        self.words = sorted(words)
+        self.by_signature = {}
+        self.by_signature_less_one = {}
+        self.by_fragment = {}
+        for word in self.words:
+            key = signature(word)
+            self.by_signature.setdefault(key, []).append(word)
+            if len(word) <= RACK_SIZE:
+                for i in range(len(key)):
+                    if i and key[i] == key[i - 1]:
+                        continue
+                    self.by_signature_less_one.setdefault(key[:i] + key[i + 1:], []).append(word)
+            for fragment in set(word) | {word[i:i + 2] for i in range(len(word) - 1)}:
+                self.by_fragment.setdefault(fragment, []).append(word)
+        self.build_text()
+
+    def build_text(self):
+        # Words of each length, one per line, for regex queries
+        by_length = {}
+        for word in self.words:
+            by_length.setdefault(len(word), []).append(word)
+        self.text_by_length = {length: '\n'.join(words) for length, words in by_length.items()}
+
+    def __getstate__(self):
+        return {
+            'words': self.words,
+            'by_signature': self.by_signature,
+            'by_signature_less_one': self.by_signature_less_one,
+            'by_fragment': self.by_fragment,
+        }
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.build_text()
+
+    def anagrams(self, rack):
+        '''
+        Words using every tile of the rack, '_' for blanks.
+        '''
+        return self.find(rack, use_all=True)
+
+    def sub_anagrams(self, rack):
+        '''
+        Words using any of the tiles of the rack, '_' for blanks,
+        longest first.
+        '''
+        return self.find(rack, use_all=False)
+
+    def find(self, rack, use_all):
+        rack = rack.upper()
+        blanks = rack.count('_')
+        letters = signature(letter for letter in rack if letter.isalpha())
+        if blanks > 2:
+            raise ValueError('a rack can use at most 2 blanks')
+
+        if use_all:
+            subsets = {letters}
+        else:
+            subsets = sub_signatures(letters)
+
+        # Signatures to look up, each once: one blank fills in a letter
+        # missing from a subset of the rack, two fill in one more than that
+        less_one = set()
+        if blanks >= 1:
+            less_one.update(subsets)
+        if blanks == 2:
+            less_one.update(signature(subset + letter) for subset in subsets for letter in 'ABCDEFGHIJKLMNOPQRSTUVWXYZ')
+
+        found = set()
+        for key in subsets:
+            found.update(self.by_signature.get(key, ()))
+        for key in less_one:
+            found.update(self.by_signature_less_one.get(key, ()))
+        if use_all:
+            # Blanks have to be used too
+            found = {word for word in found if len(word) == len(letters) + blanks}
+        # Alphabetical, then longest first (the sort is stable)
+        words = sorted(found)
+        words.sort(key=len, reverse=True)
+        return words
+
+    def pattern(self, pattern):
+        '''
+        Words matching a pattern like '?A?E', '?' or '_' for any letter.
+        '''
+        pattern = pattern.upper()
+        text = self.text_by_length.get(len(pattern), '')
+        regex = ''.join('[A-Z]' if letter in '?_' else re.escape(letter) for letter in pattern)
+        return re.findall(f'^{regex}$', text, re.MULTILINE)
+
+    def contains(self, fragment):
+        '''
+        Words containing fragment anywhere.
+        '''
+        fragment = fragment.upper()
+        if not fragment:
+            return list(self.words)
+        if len(fragment) <= 2:
+            return list(self.by_fragment.get(fragment, ()))
+        # Only words with the rarest pair of letters in fragment can match
+        pairs = [self.by_fragment.get(fragment[i:i + 2], ()) for i in range(len(fragment) - 1)]
+        return [word for word in min(pairs, key=len) if fragment in word]
+
+    def starts_with(self, prefix):
+        '''
+        Words starting with prefix.
+        '''
+        prefix = prefix.upper()
+        start = bisect.bisect_left(self.words, prefix)
+        end = bisect.bisect_left(self.words, prefix + '[')  # '[' sorts after 'Z'
+        return self.words[start:end]
+
+def sub_signatures(letters):
+    '''
+    Every distinct sub-multiset of a sorted string of letters, as signatures.
+    '''
+    subsets = {''}
+    for letter in letters:
+        subsets |= {subset + letter for subset in subsets}
+    return subsets
+
+def load_word_finder(file_path='word_list.lex', cache_path=None):
+    '''
+    Builds the word finder for a dictionary, or loads it from a cache file
+    written next to the dictionary by an earlier build.
+    '''
+    if cache_path is None:
+        cache_path = os.path.splitext(file_path)[0] + '.finder'
+
+    # The cache is only used for the exact dictionary file it was built from
+    stat = os.stat(file_path)
+    source = (CACHE_VERSION, stat.st_size, stat.st_mtime_ns)
+    if os.path.exists(cache_path):
+        with open(cache_path, 'rb') as file:
+            cached_source, finder = pickle.load(file)
+        if cached_source == source:
+            return finder
+
+    finder = WordFinder(read_dictionary(file_path))
+    tmp_path = cache_path + '.tmp'
+    with open(tmp_path, 'wb') as file:
+        pickle.dump((source, finder), file, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, cache_path)
+    return finder
+
+if __name__ == '__main__':
+    # Usage: python word_finder.py anagram|pattern|contains|starts QUERY
+    finder = load_word_finder()
+    queries = {
+        'anagram': finder.sub_anagrams,
+        'pattern': finder.pattern,
+        'contains': finder.contains,
+        'starts': finder.starts_with,
+    }
+    print(' '.join(queries[sys.argv[1]](sys.argv[2])))